@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Room, Booking, Trip, Profile, Todo, ChatMessage, FutureProject
+from .models import Room, Booking, BookingSeries, BookingTombstone, Trip, Profile, Todo, ChatMessage, FutureProject, ExportJob, BillingPeriod, BillingRollup
 
 
 @admin.register(Room)
@@ -15,6 +15,17 @@ class BookingAdmin(admin.ModelAdmin):
     search_fields = ('title', 'created_by__username')
 
 
+@admin.register(BookingSeries)
+class BookingSeriesAdmin(admin.ModelAdmin):
+    list_display = ('id', 'freq', 'interval', 'weekdays', 'until', 'count', 'created_by', 'created_at')
+    list_filter  = ('freq',)
+
+
+@admin.register(BookingTombstone)
+class BookingTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('booking_id', 'room_id', 'start', 'end', 'deleted_at')
+
+
 @admin.register(Trip)
 class TripAdmin(admin.ModelAdmin):
     list_display = ('destination', 'date', 'created_by')
@@ -45,3 +56,20 @@ class FutureProjectAdmin(admin.ModelAdmin):
     list_display  = ('title', 'provider', 'status', 'target_date', 'budget', 'created_by')
     list_filter   = ('status',)
     search_fields = ('title', 'provider')
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display  = ('id', 'kind', 'file_format', 'date_from', 'date_to', 'status', 'rows_written', 'rows_total', 'requested_by', 'created_at')
+    list_filter   = ('kind', 'status')
+
+
+@admin.register(BillingPeriod)
+class BillingPeriodAdmin(admin.ModelAdmin):
+    list_display  = ('month', 'closed_at', 'closed_by')
+
+
+@admin.register(BillingRollup)
+class BillingRollupAdmin(admin.ModelAdmin):
+    list_display  = ('month', 'room', 'user', 'bookings', 'hours', 'revenue')
+    list_filter   = ('month', 'room')
@@ -0,0 +1,154 @@
+"""
+Room utilization analytics on a NumPy occupancy matrix.
+
+``occupancy`` turns the bookings of a date range into a boolean array of
+shape ``(rooms, days, 96)`` — one cell per room, local day and 15-minute
+slot — built with a difference array (one ``bincount`` + ``cumsum``)
+instead of looping over slots in Python. ``utilization_stats`` reduces it
+to per-room, per-hour and per-weekday utilization, peak hours and idle
+rooms, all as array operations.
+
+Bookings are read as ``(room_id, start, end)`` epoch seconds computed by
+the database (``Epoch``), which skips Django's per-row datetime parsing.
+Days are 24 hours from local midnight, which holds for fixed-offset zones
+such as the project's Asia/Manila. Holidays are masked out of every
+statistic; Rejected bookings do not occupy a room.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Func, IntegerField
+
+from .models import Booking, Holiday, Room
+from .utils import local_day_bounds
+
+SLOT_MINUTES   = 15
+SLOT_SECONDS   = SLOT_MINUTES * 60
+SLOTS_PER_HOUR = 60 // SLOT_MINUTES
+SLOTS_PER_DAY  = 24 * SLOTS_PER_HOUR
+
+DEFAULT_HOURS  = (8, 18)     # opening hours used for utilization percentages
+IDLE_THRESHOLD = 0.05        # rooms used less than this share of opening hours
+PEAK_HOURS     = 3
+
+
+class Epoch(Func):
+    """Seconds since 1970-01-01 UTC of a DateTimeField, as an integer."""
+    template     = "CAST(EXTRACT(EPOCH FROM %(expressions)s) AS BIGINT)"
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection,
+                           template="CAST(strftime('%%%%s', %(expressions)s) AS INTEGER)", **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="UNIX_TIMESTAMP(%(expressions)s)", **extra_context)
+
+
+class Occupancy:
+    """Occupancy matrix of ``rooms`` × ``days`` × 15-minute slots."""
+
+    def __init__(self, rooms, days, holidays, occupied):
+        self.rooms    = rooms       # [(room_id, name)], matrix row order
+        self.days     = days        # [date], matrix column order
+        self.holidays = holidays    # bool (days,) — True on a Holiday
+        self.occupied = occupied    # bool (rooms, days, SLOTS_PER_DAY)
+
+
+def occupancy(date_from, date_to, rooms=None):
+    """Build the ``Occupancy`` of local days ``date_from``..``date_to`` (inclusive)."""
+    rooms = Room.objects.order_by('name') if rooms is None else rooms
+    rooms = list(rooms.values_list('id', 'name'))
+    n_days = (date_to - date_from).days + 1
+    days = [date_from + timedelta(days=i) for i in range(n_days)]
+    lo, hi = local_day_bounds(date_from, n_days)
+    n_slots = n_days * SLOTS_PER_DAY
+
+    rows = (
+        Booking.objects
+        .filter(start__lt=hi, end__gt=lo, room_id__in=[pk for pk, _ in rooms])
+        .exclude(status='Rejected')
+        .annotate(s=Epoch('start'), e=Epoch('end'))
+        .values_list('room_id', 's', 'e')
+    )
+    data = np.array(list(rows), dtype=np.int64).reshape(-1, 3)
+
+    room_ids = np.array([pk for pk, _ in rooms], dtype=np.int64)
+    order = np.argsort(room_ids)
+    row = order[np.searchsorted(room_ids, data[:, 0], sorter=order)] if len(rooms) else data[:, 0]
+    t0 = int(lo.timestamp())
+    first = np.clip((data[:, 1] - t0) // SLOT_SECONDS, 0, n_slots)
+    last = np.clip(-(-(data[:, 2] - t0) // SLOT_SECONDS), 0, n_slots)    # ceil: partly used slots count
+
+    # +1 where a booking starts, -1 where it ends; a running sum gives bookings per slot.
+    width = n_slots + 1
+    diff = np.bincount(row * width + first, minlength=len(rooms) * width)
+    diff -= np.bincount(row * width + last, minlength=len(rooms) * width)
+    in_use = np.cumsum(diff.reshape(len(rooms), width)[:, :n_slots], axis=1) > 0
+
+    holiday_dates = set(Holiday.objects.filter(date__range=(date_from, date_to)).values_list('date', flat=True))
+    holidays = np.array([d in holiday_dates for d in days], dtype=bool)
+    return Occupancy(rooms, days, holidays, in_use.reshape(len(rooms), n_days, SLOTS_PER_DAY))
+
+
+def _ratio(num, den):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.true_divide(num, den)
+    return [None if np.isnan(v) else round(float(v), 4) for v in np.ravel(out)]
+
+
+def utilization_stats(occ, hours=DEFAULT_HOURS, idle_threshold=IDLE_THRESHOLD):
+    """
+    Utilization shares (0..1) computed from an ``Occupancy``, holidays excluded.
+
+    ``hours`` is the ``(first, last)`` opening hour window used for the
+    per-room, per-weekday and concurrency figures; ``by_hour`` and
+    ``heatmap`` (weekday × hour) cover all 24 hours.
+    """
+    open_days = ~occ.holidays
+    occupied = occ.occupied[:, open_days, :]                          # (R, D, S)
+    n_rooms, n_days, _ = occupied.shape
+    window = slice(hours[0] * SLOTS_PER_HOUR, hours[1] * SLOTS_PER_HOUR)
+    in_window = occupied[:, :, window]                                # (R, D, W)
+    window_slots = in_window.shape[2]
+
+    hourly = occupied.reshape(n_rooms, n_days, 24, SLOTS_PER_HOUR).sum(axis=3)   # (R, D, 24)
+    by_hour = _ratio(hourly.sum(axis=(0, 1)), n_rooms * n_days * SLOTS_PER_HOUR)
+
+    weekdays = np.array([d.weekday() for d in occ.days], dtype=np.int64)[open_days]
+    days_per_weekday = np.bincount(weekdays, minlength=7)
+    by_weekday = _ratio(
+        np.bincount(weekdays, weights=in_window.sum(axis=(0, 2)), minlength=7),
+        days_per_weekday * n_rooms * window_slots,
+    )
+    onehot = np.eye(7, dtype=np.int64)[weekdays]                      # (D, 7)
+    heatmap = np.array(_ratio(
+        onehot.T @ hourly.sum(axis=0),                                # (7, 24)
+        days_per_weekday[:, None] * n_rooms * SLOTS_PER_HOUR,
+    ), dtype=object).reshape(7, 24).tolist()
+
+    per_room = _ratio(in_window.sum(axis=(1, 2)), n_days * window_slots)
+    concurrent = in_window.sum(axis=0)                                # (D, W) rooms in use per slot
+    window_by_hour = np.array([h if h is not None else -1 for h in by_hour[hours[0]:hours[1]]])
+    peak = np.argsort(-window_by_hour, kind='stable')[:PEAK_HOURS] + hours[0]
+
+    rooms = [
+        {'id': pk, 'name': name, 'utilization': u}
+        for (pk, name), u in zip(occ.rooms, per_room)
+    ]
+    return {
+        'from':         occ.days[0].isoformat() if occ.days else None,
+        'to':           occ.days[-1].isoformat() if occ.days else None,
+        'hours':        list(hours),
+        'days':         n_days,
+        'holidays':     int(occ.holidays.sum()),
+        'utilization':  _ratio(in_window.sum(), n_rooms * n_days * window_slots)[0],
+        'rooms':        rooms,
+        'by_hour':      by_hour,
+        'by_weekday':   by_weekday,
+        'heatmap':      heatmap,
+        'peak_hours':   [{'hour': int(h), 'utilization': by_hour[h]} for h in peak],
+        'peak_rooms_in_use': int(concurrent.max()) if concurrent.size else 0,
+        'avg_rooms_in_use':  round(float(concurrent.mean()), 2) if concurrent.size else 0,
+        'idle_rooms':   [r for r in rooms if r['utilization'] is not None and r['utilization'] < idle_threshold],
+    }
@@ -0,0 +1,75 @@
+"""
+Free-slot search across rooms.
+
+``free_slots`` answers "where can I book N minutes, earliest first?" from
+a single range query: the window's bookings of every matching room are
+loaded at once into per-room ``_RoomIntervals`` (sorted starts plus a
+running maximum of ends), each room's free gaps are swept day by day
+inside opening hours, and the per-room candidate streams are merged
+lazily with ``heapq.merge`` until ``limit`` candidates are found.
+
+Like ``create_booking``, every stored booking blocks its room whatever
+its status, so a returned slot can be booked as is. Holidays are skipped.
+"""
+import heapq
+from datetime import timedelta
+from itertools import islice
+
+from django.utils import timezone
+
+from .analytics import DEFAULT_HOURS, SLOT_MINUTES
+from .intervals import _RoomIntervals
+from .models import Booking, Holiday
+from .utils import local_day_bounds
+
+SLOT = timedelta(minutes=SLOT_MINUTES)
+
+
+def ceil_slot(value):
+    """Round an aware datetime up to the next local 15-minute boundary."""
+    local = timezone.localtime(value)
+    floor = local.replace(minute=local.minute - local.minute % SLOT_MINUTES, second=0, microsecond=0)
+    return floor if floor == local else floor + SLOT
+
+
+def free_slots(rooms, date_from, date_to, duration, hours=DEFAULT_HOURS, limit=10, not_before=None):
+    """
+    Earliest ``limit`` ``(start, room)`` pairs where ``duration`` fits.
+
+    ``rooms`` is an iterable of Room; days run ``date_from``..``date_to``
+    (local, inclusive) and a slot must lie within ``hours`` (first, last
+    hour) of one day. Starts are on 15-minute boundaries and no earlier
+    than ``not_before``. One candidate is returned per free gap.
+    """
+    rooms = list(rooms)
+    n_days = (date_to - date_from).days + 1
+    lo, hi = local_day_bounds(date_from, n_days)
+    rows = {room.pk: [] for room in rooms}
+    for room_id, start, end, pk in (
+        Booking.objects
+        .filter(room__in=rooms, start__lt=hi, end__gt=lo)
+        .values_list('room_id', 'start', 'end', 'id')
+    ):
+        rows[room_id].append((start, end, pk))
+
+    holidays = set(Holiday.objects.filter(date__range=(date_from, date_to)).values_list('date', flat=True))
+    days = [date_from + timedelta(days=i) for i in range(n_days)]
+    days = [d for d in days if d not in holidays]
+
+    def candidates(room):
+        intervals = _RoomIntervals(rows[room.pk])
+        for day in days:
+            midnight = local_day_bounds(day)[0]
+            opens, closes = midnight + timedelta(hours=hours[0]), midnight + timedelta(hours=hours[1])
+            if not_before is not None:
+                opens = max(opens, ceil_slot(not_before))
+            if opens + duration > closes:
+                continue
+            for gap_start, gap_end in intervals.free(opens, closes):
+                start = ceil_slot(gap_start)
+                if start + duration <= gap_end:
+                    yield start, room
+
+    streams = [candidates(room) for room in rooms]
+    merged = heapq.merge(*streams, key=lambda c: (c[0], c[1].name))
+    return list(islice(merged, limit))
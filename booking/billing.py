@@ -0,0 +1,66 @@
+"""
+Set-based billing recalculation.
+
+Costs are ``hours_used * room.price_per_hour`` rounded to the cent. Rather
+than re-saving bookings one by one, ``recalculate_costs`` computes the cost
+of every distinct (room, hours_used) pair in Python ``Decimal`` and applies
+them all in a single ``UPDATE ... SET total_cost = CASE ... END``, so the
+result is exact on every database backend.
+"""
+import time
+
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .models import Booking, Room
+from .rollups import rebuild_open_periods
+from .utils import compute_cost, filter_by_dates
+from .versions import bump_version_on_commit
+
+
+def recalculate_costs(room=None, date_from=None, date_to=None, future_only=False, pending_only=False):
+    """
+    Recompute ``total_cost`` for the selected bookings from current room rates.
+
+    ``room`` (Room or id) and ``date_from``/``date_to`` (local dates,
+    inclusive) narrow the set; ``future_only`` keeps bookings starting from
+    now on, ``pending_only`` keeps status "Pending". Returns
+    ``{"rows": <rows updated>, "elapsed": <seconds>}``.
+    """
+    started = time.perf_counter()
+    bookings = filter_by_dates(Booking.objects.all(), date_from, date_to)
+    rooms = Room.objects.all()
+    if room is not None:
+        bookings = bookings.filter(room=room)
+        rooms = rooms.filter(pk=getattr(room, "pk", room))
+    if future_only:
+        bookings = bookings.filter(start__gte=timezone.now())
+    if pending_only:
+        bookings = bookings.filter(status="Pending")
+
+    rates = dict(rooms.values_list("id", "price_per_hour"))
+    hours_by_room = {}
+    for room_id, hours in bookings.order_by().values_list("room_id", "hours_used").distinct():
+        if room_id in rates:
+            hours_by_room.setdefault(room_id, []).append(hours)
+
+    # CASE room_id WHEN .. THEN (CASE hours_used WHEN .. THEN cost ..) — nested so
+    # each row tests rooms + its room's durations, not every (room, hours) pair.
+    cost_field = DecimalField(max_digits=10, decimal_places=2)
+    whens = [
+        When(room_id=room_id, then=Case(
+            *[When(hours_used=h, then=Value(compute_cost(h, rates[room_id]))) for h in hours],
+            default=F("total_cost"), output_field=cost_field,
+        ))
+        for room_id, hours in hours_by_room.items()
+    ]
+    rows = 0
+    if whens:
+        rows = bookings.update(
+            total_cost=Case(*whens, default=F("total_cost"), output_field=cost_field), updated_at=Now(),
+        )
+        # update() bypasses post_save, so announce the change ourselves.
+        bump_version_on_commit("bookings")
+        rebuild_open_periods(bookings)
+    return {"rows": rows, "elapsed": time.perf_counter() - started}
@@ -0,0 +1,62 @@
+"""
+Cached room catalog.
+
+Rooms change a few times a month but are listed on most pages: the
+dashboard cards and room data, the booking form's room select, the room
+pickers of the admin pages. ``room_catalog()`` builds all of that once —
+Room instances in both orders, the dashboard's serialized dicts and the
+form choices — and caches it under ChangeVersion('rooms'), which Room
+save/delete bumps, so every worker rebuilds after a change and a request
+otherwise costs one counter lookup.
+
+The catalog is shared between requests: treat its rooms and lists as
+read-only, and fetch a Room from the database to change it.
+"""
+from django.core.cache import cache
+
+from .models import Room
+from .versions import current_version
+
+ROOM_CATALOG_CACHE_SECONDS = 24 * 60 * 60
+PLACEHOLDER_IMAGE = '/static/img/placeholder.png'
+
+_memo = (None, None)    # (version, RoomCatalog) of this process
+
+
+class RoomCatalog:
+    def __init__(self, rooms):
+        self.rooms   = rooms                                        # by id
+        self.by_name = sorted(rooms, key=lambda r: r.name)
+        self.by_id   = {r.pk: r for r in rooms}
+        self.data    = [                                            # dashboard room cards (JSON)
+            {
+                'id': r.id, 'name': r.name, 'capacity': r.capacity,
+                'projector': r.projector, 'speaker': r.speaker,
+                'tables': r.tables, 'chairs': r.chairs,
+                'image_url': r.image.url if r.image else PLACEHOLDER_IMAGE,
+                'price_per_hour': float(r.price_per_hour),
+            }
+            for r in rooms
+        ]
+        self.choices = [('', '---------')] + [(r.pk, str(r)) for r in rooms]     # BookingForm.room
+
+    def get(self, pk):
+        try:
+            return self.by_id.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+
+def room_catalog():
+    """The current ``RoomCatalog``: this process's copy, else the cache's, else built."""
+    global _memo
+    version = current_version('rooms')
+    if _memo[0] == version:
+        return _memo[1]
+    cache_key = f"room_catalog:{version}"
+    catalog = cache.get(cache_key)
+    if catalog is None:
+        catalog = RoomCatalog(list(Room.objects.order_by('id')))
+        cache.set(cache_key, catalog, ROOM_CATALOG_CACHE_SECONDS)
+    _memo = (version, catalog)
+    return catalog
@@ -0,0 +1,61 @@
+"""
+In-process pub/sub for chat, feeding the Server-Sent Events stream.
+
+``chat_send`` / ``chat_delete_message`` run in worker threads and call
+``chat_broker.publish``; every open ``/chat/stream/`` connection owns an
+asyncio queue on the server's event loop and receives the event within
+the same tick. Subscribers that fall behind lose events and catch up from
+the database on their next resync (see ``views.chat_stream``).
+"""
+import asyncio
+import json
+import threading
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class ChatBroker:
+    def __init__(self):
+        self._subscribers = set()   # {(loop, queue)}
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = {s for s in self._subscribers if s[1] is not queue}
+
+    def publish(self, event, data):
+        """Thread-safe: deliver ``(event, data)`` to every open stream."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, (event, data))
+            except RuntimeError:    # loop already closed
+                self.unsubscribe(queue)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+def _offer(queue, item):
+    try:
+        queue.put_nowait(item)
+    except asyncio.QueueFull:
+        pass
+
+
+def sse(event, data, event_id=None):
+    """Format one Server-Sent Events frame."""
+    frame = f"event: {event}\n"
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+chat_broker = ChatBroker()
@@ -0,0 +1,182 @@
+"""
+Background export jobs.
+
+``enqueue_export`` records an ``ExportJob`` and hands it to a small
+in-process thread pool; ``manage.py run_export_jobs`` drains the same
+queue from a separate process (e.g. after a restart, or with
+``EXPORT_JOBS_IN_PROCESS = False``). Asking again for an export the
+same user already has queued or running returns that job. Finished files
+live under ``MEDIA_ROOT/exports/`` and are reused while
+``ChangeVersion('bookings')`` and ``ChangeVersion('users')`` (the files
+carry usernames) are unchanged.
+
+A job still "Running" ``STALE_AFTER`` after it started lost its worker
+and is marked Failed, so pollers stop waiting. When a job finishes, the
+files of the same export it supersedes, and of any job finished more
+than ``FILE_RETENTION`` ago, are deleted.
+"""
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .exports import BILLING_HEADER, BOOKINGS_HEADER, billing_rows, booking_rows, write_xlsx
+from .models import Booking, ExportJob
+from .utils import filter_by_dates
+from .versions import current_versions
+
+PROGRESS_EVERY = 5000
+STALE_AFTER    = timedelta(minutes=30)
+FILE_RETENTION = timedelta(days=7)
+STALE_ERROR    = "The export worker stopped before finishing. Start the export again."
+
+EXPORTS = {
+    "bookings": ("Bookings", BOOKINGS_HEADER, booking_rows),
+    "billing":  ("Room Billing", BILLING_HEADER, billing_rows),
+}
+
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, "EXPORT_JOB_WORKERS", 2))
+
+
+def enqueue_export(user, kind, file_format, date_from=None, date_to=None):
+    """
+    Return ``user``'s queued or running job for the same export, else a
+    reusable finished one, else queue a new one.
+    """
+    fail_stale_jobs()
+    in_flight = (
+        ExportJob.objects
+        .filter(kind=kind, file_format=file_format, date_from=date_from, date_to=date_to,
+                requested_by=user, status__in=["Queued", "Running"])
+        .order_by("-pk")
+        .first()
+    )
+    if in_flight:
+        return in_flight
+    versions = current_versions("bookings", "users")
+    reusable = (
+        ExportJob.objects
+        .filter(kind=kind, file_format=file_format, date_from=date_from, date_to=date_to,
+                status="Done", source_version=versions["bookings"], users_version=versions["users"])
+        .exclude(file="")
+        .first()
+    )
+    if reusable and os.path.exists(reusable.file.path):
+        return reusable
+
+    job = ExportJob.objects.create(
+        kind=kind, file_format=file_format,
+        date_from=date_from, date_to=date_to,
+        requested_by=user,
+    )
+    if getattr(settings, "EXPORT_JOBS_IN_PROCESS", True):
+        _executor.submit(_run_in_thread, job.pk)
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connection.close()
+
+
+def run_job(job_id):
+    """Generate the file for a queued job. Returns False if another worker claimed it."""
+    if not ExportJob.objects.filter(pk=job_id, status="Queued").update(status="Running", started_at=timezone.now()):
+        return False
+    job = ExportJob.objects.get(pk=job_id)
+    try:
+        sheet_title, header, make_rows = EXPORTS[job.kind]
+        # Read before the rows, so a booking or user changed mid-export invalidates the file.
+        versions = current_versions("bookings", "users")
+        job.source_version = versions["bookings"]
+        job.users_version  = versions["users"]
+        bookings = filter_by_dates(Booking.objects.all(), job.date_from, job.date_to)
+        job.rows_total = bookings.count()
+        job.save(update_fields=["source_version", "users_version", "rows_total"])
+
+        name = f"exports/{job.kind}_{job.pk}.{job.file_format}"
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = _track_progress(job, make_rows(bookings))
+        if job.file_format == "csv":
+            with open(path, "w", newline="", encoding="utf-8") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(header)
+                writer.writerows(rows)
+        else:
+            with open(path, "wb") as fh:
+                write_xlsx(fh, sheet_title, header, rows)
+
+        job.file.name = name
+        job.status = "Done"
+        job.finished_at = timezone.now()
+        job.save(update_fields=["file", "status", "rows_written", "finished_at"])
+        prune_exports(job)
+    except Exception as exc:
+        job.status = "Failed"
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        raise
+    return True
+
+
+def _track_progress(job, rows):
+    for n, row in enumerate(rows, 1):
+        yield row
+        if n % PROGRESS_EVERY == 0:
+            ExportJob.objects.filter(pk=job.pk).update(rows_written=n)
+        job.rows_written = n
+
+
+def is_stale(job, now=None):
+    """A "Running" job whose worker has been gone for ``STALE_AFTER``."""
+    cutoff = (now or timezone.now()) - STALE_AFTER
+    return job.status == "Running" and (job.started_at is None or job.started_at < cutoff)
+
+
+def fail_stale_jobs(now=None):
+    """Mark every stale job Failed. Returns the count."""
+    now = now or timezone.now()
+    return (
+        ExportJob.objects
+        .filter(Q(started_at__lt=now - STALE_AFTER) | Q(started_at__isnull=True), status="Running")
+        .update(status="Failed", error=STALE_ERROR, finished_at=now)
+    )
+
+
+def prune_exports(job, now=None):
+    """
+    Delete the files of older jobs for the same export as ``job`` and of
+    jobs finished more than ``FILE_RETENTION`` ago. Returns the count.
+    """
+    now = now or timezone.now()
+    old = list(
+        ExportJob.objects
+        .filter(Q(kind=job.kind, file_format=job.file_format, date_from=job.date_from,
+                  date_to=job.date_to, pk__lt=job.pk)
+                | Q(finished_at__lt=now - FILE_RETENTION))
+        .exclude(pk=job.pk)
+        .exclude(file="")
+    )
+    for old_job in old:
+        old_job.file.delete(save=False)
+    ExportJob.objects.filter(pk__in=[j.pk for j in old]).update(file="")
+    return len(old)
+
+
+def run_pending_jobs():
+    """Run every queued job; returns how many this worker completed."""
+    fail_stale_jobs()
+    done = 0
+    for job_id in ExportJob.objects.filter(status="Queued").order_by("created_at").values_list("pk", flat=True):
+        if run_job(job_id):
+            done += 1
+    return done
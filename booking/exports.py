@@ -0,0 +1,82 @@
+"""
+Excel exports for bookings and billing.
+
+Rows are read as ``values_list`` tuples through ``.iterator()`` and written
+with openpyxl's write-only mode (rows go straight to a temp file), so
+memory stays flat no matter how many bookings are exported. The finished
+file is streamed back with ``FileResponse``.
+"""
+import tempfile
+
+from django.http import FileResponse
+from openpyxl import Workbook
+
+EXPORT_CHUNK_SIZE = 2000
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+BOOKINGS_HEADER = [
+    "ID", "Title", "Room", "Start", "End", "Created By", "Attendees",
+    "Status", "Hours Used", "Rate/hr (PHP)", "Total Cost (PHP)",
+]
+BILLING_HEADER = [
+    "ID", "Title", "Room", "Start", "End",
+    "Hours Used", "Rate/hr (PHP)", "Total Cost (PHP)",
+    "Booked By", "Status",
+]
+ROLLUP_HEADER = ["Month", "Room", "Booked By", "Bookings", "Hours", "Revenue (PHP)"]
+
+
+def booking_rows(bookings):
+    fields = (
+        "id", "title", "room__name", "start", "end", "created_by__username",
+        "attendees", "status", "hours_used", "room__price_per_hour", "total_cost",
+    )
+    rows = bookings.order_by("-start").values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for pk, title, room, start, end, user, attendees, status, hours, rate, cost in rows:
+        yield [
+            pk, title, room,
+            start.strftime("%Y-%m-%d %H:%M"),
+            end.strftime("%Y-%m-%d %H:%M"),
+            user, attendees, status,
+            float(hours), float(rate), float(cost),
+        ]
+
+
+def billing_rows(bookings):
+    fields = (
+        "id", "title", "room__name", "start", "end",
+        "hours_used", "room__price_per_hour", "total_cost", "created_by__username", "status",
+    )
+    rows = bookings.order_by("-start").values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for pk, title, room, start, end, hours, rate, cost, user, status in rows:
+        yield [
+            pk, title, room,
+            start.strftime("%Y-%m-%d %H:%M"),
+            end.strftime("%Y-%m-%d %H:%M"),
+            float(hours), float(rate), float(cost),
+            user, status,
+        ]
+
+
+def rollup_rows(rollups):
+    fields = ("month", "room__name", "user__username", "bookings", "hours", "revenue")
+    rows = rollups.order_by("-month", "room__name", "user__username").values_list(*fields)
+    for month, room, user, count, hours, revenue in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [month.strftime("%Y-%m"), room, user, count, float(hours), float(revenue)]
+
+
+def write_xlsx(fileobj, sheet_title, header, rows):
+    """Write ``header`` + ``rows`` as a single-sheet XLSX into ``fileobj``."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(fileobj)
+
+
+def xlsx_response(filename, sheet_title, header, rows):
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(tmp, sheet_title, header, rows)
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
@@ -0,0 +1,157 @@
+"""
+Calendar feed encodings for ``api_bookings``.
+
+``booking_event`` is the FullCalendar event object the dashboard has
+always used: every event repeats its room name, room image URL, creator
+and colour (twice). ``event_rows`` builds the same objects for a whole
+queryset from one ``values_list`` query (``serializers.project``). ``compact_events`` is the opt-in ``?format=compact``
+encoding of the same data:
+
+* rooms and users are dictionary-encoded once — each event carries an
+  index into ``rooms`` / ``users`` instead of their strings;
+* events are parallel arrays (one list per column) rather than one
+  object per event, so keys are not repeated;
+* start / end are epoch seconds computed by the database (``Epoch``);
+  ``color`` is null unless the booking overrides its creator's colour.
+
+Both honour ``fields`` (``?fields=room_name,attendees``), the
+extendedProps to send; ``static/booking/js/compact_feed.js`` expands the
+compact form back into FullCalendar events.
+"""
+from django.contrib.auth.models import User
+from django.db.models import Value
+from django.db.models.functions import Coalesce, NullIf
+
+from .analytics import Epoch
+from .models import Room
+from .serializers import as_float, iso, media_url, project
+
+EVENT_FIELDS = ('room_name', 'created_by', 'attendees', 'room_image', 'total_cost', 'hours_used', 'status', 'series')
+PLACEHOLDER_IMAGE = '/static/img/placeholder.png'
+
+_PROPS = {
+    'room_name':  lambda b: b.room.name,
+    'created_by': lambda b: b.created_by.username,
+    'attendees':  lambda b: b.attendees,
+    'room_image': lambda b: b.room.image.url if b.room.image else PLACEHOLDER_IMAGE,
+    'total_cost': lambda b: float(b.total_cost),
+    'hours_used': lambda b: float(b.hours_used),
+    'status':     lambda b: b.status,
+    'series':     lambda b: b.series_id,
+}
+
+# The same, as ``project`` columns.
+_PROP_COLUMNS = {
+    'room_name':  'room__name',
+    'created_by': 'created_by__username',
+    'attendees':  'attendees',
+    'room_image': ('room__image', media_url(Room._meta.get_field('image'), PLACEHOLDER_IMAGE)),
+    'total_cost': ('total_cost', as_float),
+    'hours_used': ('hours_used', as_float),
+    'status':     'status',
+    'series':     'series_id',
+}
+
+# Per-event columns of the compact form: extendedProp -> Booking column.
+_COLUMNS = {
+    'attendees':  'attendees',
+    'total_cost': 'total_cost',
+    'hours_used': 'hours_used',
+    'status':     'status',
+    'series':     'series_id',
+}
+_FLOATS = {'total_cost', 'hours_used'}
+
+
+def parse_fields(value):
+    """The ``EVENT_FIELDS`` named in a comma-separated ``fields`` param (all of them if empty)."""
+    if not value:
+        return EVENT_FIELDS
+    wanted = {name.strip() for name in value.split(',')}
+    return tuple(name for name in EVENT_FIELDS if name in wanted)
+
+
+def booking_event(b, fields=EVENT_FIELDS):
+    """FullCalendar event for a Booking loaded with ``room`` and ``created_by__profile``."""
+    color = b.display_color()
+    return {
+        'id': b.id,
+        'title': b.title,
+        'start': b.start.isoformat(),
+        'end': b.end.isoformat(),
+        'backgroundColor': color,
+        'borderColor':     color,
+        'extendedProps': {name: _PROPS[name](b) for name in fields},
+    }
+
+
+def event_rows(bookings, fields=EVENT_FIELDS, chunk_size=None):
+    """``booking_event`` of each booking in the queryset, without loading Booking instances."""
+    columns = {
+        'id':    'id',
+        'title': 'title',
+        'start': ('start', iso),
+        'end':   ('end', iso),
+        # Booking.display_color(), worked out by the database.
+        'color': Coalesce(NullIf('color', Value('')), 'created_by__profile__color', Value('#6366F1')),
+        **{name: _PROP_COLUMNS[name] for name in fields},
+    }
+    for row in project(bookings, columns, chunk_size):
+        yield {
+            'id': row['id'],
+            'title': row['title'],
+            'start': row['start'],
+            'end': row['end'],
+            'backgroundColor': row['color'],
+            'borderColor':     row['color'],
+            'extendedProps': {name: row[name] for name in fields},
+        }
+
+
+def compact_events(bookings, limit, fields=EVENT_FIELDS):
+    """
+    The first ``limit`` of the ordered queryset ``bookings`` in the
+    compact form. Three queries: events, then their rooms and users.
+    """
+    extra = [name for name in fields if name in _COLUMNS]
+    rows = list(
+        bookings
+        .annotate(s=Epoch('start'), e=Epoch('end'))
+        .values_list('id', 'title', 's', 'e', 'room_id', 'created_by_id', 'color',
+                     *[_COLUMNS[name] for name in extra])[:limit]
+    )
+    columns = list(zip(*rows)) or [()] * (7 + len(extra))
+
+    room_ids = sorted(set(columns[4]))
+    user_ids = sorted(set(columns[5]))
+    room_index = {pk: i for i, pk in enumerate(room_ids)}
+    user_index = {pk: i for i, pk in enumerate(user_ids)}
+
+    rooms = {'id': room_ids}
+    if 'room_name' in fields or 'room_image' in fields:
+        found = {pk: (name, image) for pk, name, image in
+                 Room.objects.filter(pk__in=room_ids).values_list('id', 'name', 'image')}
+        storage = Room._meta.get_field('image').storage
+        if 'room_name' in fields:
+            rooms['name'] = [found[pk][0] for pk in room_ids]
+        if 'room_image' in fields:
+            rooms['image'] = [storage.url(found[pk][1]) if found[pk][1] else PLACEHOLDER_IMAGE for pk in room_ids]
+
+    found = {pk: (username, color) for pk, username, color in
+             User.objects.filter(pk__in=user_ids).values_list('id', 'username', 'profile__color')}
+    users = {'id': user_ids, 'color': [found[pk][1] or '#6366F1' for pk in user_ids]}
+    if 'created_by' in fields:
+        users['username'] = [found[pk][0] for pk in user_ids]
+
+    events = {
+        'id':    list(columns[0]),
+        'title': list(columns[1]),
+        'start': list(columns[2]),
+        'end':   list(columns[3]),
+        'room':  [room_index[pk] for pk in columns[4]],
+        'user':  [user_index[pk] for pk in columns[5]],
+        'color': [c or None for c in columns[6]],
+    }
+    for offset, name in enumerate(extra, start=7):
+        events[name] = [float(v) for v in columns[offset]] if name in _FLOATS else list(columns[offset])
+    return {'format': 'compact', 'fields': list(fields), 'rooms': rooms, 'users': users, 'events': events}
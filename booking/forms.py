@@ -1,8 +1,10 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Booking, Trip, Holiday, Profile
+from .models import Booking, BookingSeries, Trip, Holiday, Profile
 from .models import PasswordChangeRequest
+from .catalog import room_catalog
+from .recurrence import MAX_INTERVAL, MAX_OCCURRENCES
 
 COLOR_CHOICES = [
     ("#F1F50B", 'Yellow'),
@@ -85,6 +87,43 @@ class BookingForm(forms.ModelForm):
             'status': forms.Select(attrs={'class': 'form-select'}),  # optional styling
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Options from the cached room catalog, read when the select is rendered;
+        # the chosen room is still looked up on validation.
+        self.fields['room'].choices = lambda: room_catalog().choices
+
+WEEKDAY_CHOICES = [(str(i), name) for i, name in enumerate(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])]
+
+
+class RecurrenceForm(forms.Form):
+    """Optional "Repeat" part of the booking form; builds an unsaved BookingSeries."""
+    repeat        = forms.ChoiceField(choices=[("", "Does not repeat")] + BookingSeries.FREQ_CHOICES, required=False)
+    interval      = forms.IntegerField(min_value=1, max_value=MAX_INTERVAL, initial=1, required=False,
+                                       label="Every (days / weeks)")
+    weekdays      = forms.MultipleChoiceField(choices=WEEKDAY_CHOICES, required=False,
+                                              widget=forms.CheckboxSelectMultiple, label="On (weekly)")
+    until         = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}), label="Until")
+    count         = forms.IntegerField(min_value=1, max_value=MAX_OCCURRENCES, required=False, label="Or occurrences")
+    skip_holidays = forms.BooleanField(initial=True, required=False, label="Skip holidays")
+    skip_taken    = forms.BooleanField(required=False, label="Skip dates already booked")
+
+    def clean(self):
+        data = super().clean()
+        if data.get('repeat') and not data.get('until') and not data.get('count'):
+            raise forms.ValidationError("Set an end date or a number of occurrences for the series.")
+        return data
+
+    def series(self, user):
+        data = self.cleaned_data
+        return BookingSeries(
+            freq=data['repeat'], interval=data['interval'] or 1,
+            weekdays=",".join(data['weekdays']) if data['repeat'] == 'WEEKLY' else "",
+            until=data['until'], count=data['count'], skip_holidays=data['skip_holidays'],
+            created_by=user,
+        )
+
+
 # forms.py
 class PasswordChangeRequestForm(forms.ModelForm):
     class Meta:
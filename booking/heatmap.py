@@ -0,0 +1,149 @@
+"""
+Materialized room × local date × hour occupancy for the admin heatmap.
+
+``RoomHourOccupancy`` stores minutes booked and the number of bookings
+touching each hour. The Booking post_save / post_delete receivers in
+``models.py`` subtract a booking's previous hour cells and add its new
+ones, so moves, resizes, room changes and rejections are applied as
+deltas. ``manage.py rebuild_room_occupancy`` recomputes a date range from
+the bookings to repair drift. Bulk writes bypass the signals:
+``services.bulk_create_bookings`` and the series edits in ``recurrence``
+feed their rows to ``apply_booking_changes``; after any other
+``queryset.update()`` of times, rooms or status call ``rebuild`` for the
+affected dates.
+
+Rejected bookings do not occupy a room.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Booking, RoomHourOccupancy
+from .utils import local_day_bounds, next_month
+
+HOUR = timedelta(hours=1)
+
+
+def hour_cells(values):
+    """``{(room_id, local date, hour): minutes}`` covered by one booking's values."""
+    if not values or not values['start'] or not values['end'] or values['status'] == 'Rejected':
+        return {}
+    cursor, end = timezone.localtime(values['start']), timezone.localtime(values['end'])
+    cells = {}
+    while cursor < end:
+        boundary = min(cursor.replace(minute=0, second=0, microsecond=0) + HOUR, end)
+        cells[(values['room_id'], cursor.date(), cursor.hour)] = int((boundary - cursor).total_seconds() // 60)
+        cursor = boundary
+    return cells
+
+
+# ── incremental updates ─────────────────────────────────────────
+def apply_booking_change(old, new):
+    """Replace ``old``'s hour cells with ``new``'s (``None`` for a create or a delete)."""
+    apply_booking_changes([(old, new)])
+
+
+def apply_booking_changes(changes):
+    """
+    ``apply_booking_change`` for many ``(old, new)`` pairs: cells that do
+    not exist yet are inserted with one ``bulk_create``, the others get one
+    UPDATE each, and emptied cells are removed with one DELETE.
+    """
+    deltas = {}
+    for old, new in changes:
+        for sign, values in ((-1, old), (1, new)):
+            for key, minutes in hour_cells(values).items():
+                m, n = deltas.get(key, (0, 0))
+                deltas[key] = (m + sign * minutes, n + sign)
+    deltas = {key: d for key, d in deltas.items() if any(d)}
+    if not deltas:
+        return
+    span = RoomHourOccupancy.objects.filter(     # date IN (..) keeps SQLite on the (date, room, hour) key
+        date__in={day for _, day, _ in deltas}, room_id__in={room_id for room_id, _, _ in deltas},
+    )
+    if len(deltas) > 1:
+        existing = set(span.values_list('room_id', 'date', 'hour'))
+        new_cells = {key: d for key, d in deltas.items() if key not in existing and d[1] > 0}
+        if new_cells:
+            try:
+                with transaction.atomic():
+                    RoomHourOccupancy.objects.bulk_create([
+                        RoomHourOccupancy(room_id=room_id, date=day, hour=hour, minutes=m, bookings=n)
+                        for (room_id, day, hour), (m, n) in new_cells.items()
+                    ])
+            except IntegrityError:      # some created concurrently: one write per cell instead
+                pass
+            else:
+                deltas = {key: d for key, d in deltas.items() if key not in new_cells}
+    for (room_id, day, hour), (minutes, count) in deltas.items():
+        _add(room_id, day, hour, minutes, count)
+    if any(count < 0 for _, count in deltas.values()):
+        span.filter(bookings__lte=0).delete()
+
+
+def _add(room_id, day, hour, minutes, count):
+    cells = RoomHourOccupancy.objects.filter(date=day, room_id=room_id, hour=hour)
+    changes = dict(minutes=F('minutes') + minutes, bookings=F('bookings') + count)
+    if not cells.update(**changes):
+        try:
+            with transaction.atomic():
+                RoomHourOccupancy.objects.create(
+                    room_id=room_id, date=day, hour=hour, minutes=minutes, bookings=count,
+                )
+        except IntegrityError:      # created concurrently
+            cells.update(**changes)
+
+
+# ── rebuild / read ──────────────────────────────────────────────
+def rebuild(date_from=None, date_to=None):
+    """Recompute the cells of local dates ``date_from``..``date_to`` (default: all). Returns the row count."""
+    bookings = Booking.objects.exclude(status='Rejected')
+    stale = RoomHourOccupancy.objects.all()
+    if date_from:
+        bookings = bookings.filter(end__gt=local_day_bounds(date_from)[0])
+        stale = stale.filter(date__gte=date_from)
+    if date_to:
+        bookings = bookings.filter(start__lt=local_day_bounds(date_to)[1])
+        stale = stale.filter(date__lte=date_to)
+
+    totals = {}
+    for values in bookings.values('room_id', 'start', 'end', 'status').iterator(chunk_size=5000):
+        for key, minutes in hour_cells(values).items():
+            if (date_from and key[1] < date_from) or (date_to and key[1] > date_to):
+                continue
+            m, n = totals.get(key, (0, 0))
+            totals[key] = (m + minutes, n + 1)
+
+    with transaction.atomic():
+        stale.delete()
+        RoomHourOccupancy.objects.bulk_create(
+            [
+                RoomHourOccupancy(room_id=room_id, date=day, hour=hour, minutes=m, bookings=n)
+                for (room_id, day, hour), (m, n) in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(totals)
+
+
+def room_hour_heatmap(rooms, month):
+    """
+    ``[(room, [share of each hour 0..23])]`` for the local ``month``, where
+    share is minutes booked / minutes that hour has in the month. One query.
+    """
+    minutes = dict.fromkeys(((r.pk, h) for r in rooms for h in range(24)), 0)
+    rows = (
+        RoomHourOccupancy.objects
+        .filter(date__gte=month, date__lt=next_month(month))
+        .values('room_id', 'hour')
+        .annotate(total=Sum('minutes'))
+        .values_list('room_id', 'hour', 'total')
+        .order_by()
+    )
+    for room_id, hour, total in rows:
+        if (room_id, hour) in minutes:
+            minutes[room_id, hour] = total
+    capacity = (next_month(month) - month).days * 60
+    return [(r, [round(minutes[r.pk, h] / capacity, 3) for h in range(24)]) for r in rooms]
@@ -0,0 +1,168 @@
+"""
+In-memory per-room interval index for booking overlap / free-busy queries.
+
+Each room keeps its bookings as parallel lists sorted by start time plus a
+running maximum of end times, so "does anything overlap [start, end)?" is a
+single bisect — O(log n) — instead of a database round-trip. Inserts and
+removals bisect into those lists in place and only touch the running
+maximum as far as it changes.
+
+The index is filled lazily (one query per room, on first use) with the
+bookings that have not ended yet, so a worker holds upcoming bookings
+rather than each room's history; questions about the past may see too
+few bookings. It is kept in sync by the Booking post_save / post_delete
+receivers in ``models.py``. Those signals only fire inside this process,
+so writes made by other workers are not seen here: the index is a fast
+answer, not an authoritative one. ``services.create_booking`` uses it to
+reject overlaps before taking the room lock, and re-checks the database
+under the lock before it saves.
+"""
+import threading
+from bisect import bisect_left
+
+from django.utils import timezone
+
+from .models import Booking
+
+
+class _RoomIntervals:
+    """Sorted intervals of one room. Not thread-safe on its own."""
+
+    def __init__(self, rows=()):
+        self.items = sorted(rows, key=lambda r: (r[0], r[1], r[2]))  # (start, end, booking_id)
+        self.starts = [s for s, _, _ in self.items]
+        self.max_end = []
+        running = None
+        for _, e, _ in self.items:
+            running = e if running is None or e > running else running
+            self.max_end.append(running)
+
+    def _fix_max_end(self, i):
+        # Recompute the running maximum from position i until it agrees
+        # with the stored value again; everything after that is unchanged.
+        running = self.max_end[i - 1] if i > 0 else None
+        for j in range(i, len(self.items)):
+            e = self.items[j][1]
+            running = e if running is None or e > running else running
+            if self.max_end[j] == running and j > i:
+                return
+            self.max_end[j] = running
+
+    def add(self, start, end, booking_id):
+        i = bisect_left(self.items, (start, end, booking_id))
+        self.items.insert(i, (start, end, booking_id))
+        self.starts.insert(i, start)
+        self.max_end.insert(i, end)
+        self._fix_max_end(i)
+
+    def remove(self, booking_id, start, end):
+        i = bisect_left(self.items, (start, end, booking_id))
+        if i == len(self.items) or self.items[i][2] != booking_id:
+            return
+        del self.items[i], self.starts[i], self.max_end[i]
+        if i < len(self.items):
+            self._fix_max_end(i)
+
+    def overlaps(self, start, end):
+        i = bisect_left(self.starts, end)
+        return i > 0 and self.max_end[i - 1] > start
+
+    def busy(self, start, end):
+        """Intervals overlapping [start, end), ordered by start."""
+        i = bisect_left(self.starts, end)
+        hits = []
+        j = i - 1
+        while j >= 0 and self.max_end[j] > start:
+            if self.items[j][1] > start:
+                hits.append(self.items[j])
+            j -= 1
+        hits.reverse()
+        return hits
+
+    def free(self, start, end):
+        """Free gaps inside [start, end) as a list of (start, end) — a sweep over ``busy``."""
+        gaps, cursor = [], start
+        for s, e, _ in self.busy(start, end):
+            if s > cursor:
+                gaps.append((cursor, s))
+            cursor = max(cursor, e)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+
+class RoomIntervalIndex:
+    """Process-wide registry of per-room interval lists."""
+
+    def __init__(self):
+        self._rooms = {}
+        self._where = {}            # booking_id -> (room_id, start, end), to follow moves
+        self._lock = threading.RLock()
+
+    # ── loading / maintenance ───────────────────────────────────
+    def _room(self, room_id):
+        # Callers hold self._lock.
+        room = self._rooms.get(room_id)
+        if room is None:
+            rows = list(
+                Booking.objects.filter(room_id=room_id, end__gt=timezone.now()).values_list('start', 'end', 'id')
+            )
+            room = self._rooms[room_id] = _RoomIntervals(rows)
+            for start, end, booking_id in rows:
+                self._where[booking_id] = (room_id, start, end)
+        return room
+
+    def reload(self, room_id=None):
+        """Drop cached intervals (one room or all); they are reloaded on next use."""
+        with self._lock:
+            if room_id is None:
+                self._rooms.clear()
+                self._where.clear()
+            elif self._rooms.pop(room_id, None) is not None:
+                self._where = {b: w for b, w in self._where.items() if w[0] != room_id}
+
+    def apply(self, booking):
+        """Insert or move ``booking`` after it was saved."""
+        with self._lock:
+            self.discard(booking.pk)
+            room = self._rooms.get(booking.room_id)
+            if room is not None:
+                room.add(booking.start, booking.end, booking.pk)
+                self._where[booking.pk] = (booking.room_id, booking.start, booking.end)
+
+    def discard(self, booking_id):
+        with self._lock:
+            room_id, start, end = self._where.pop(booking_id, (None, None, None))
+            if room_id is not None and room_id in self._rooms:
+                self._rooms[room_id].remove(booking_id, start, end)
+
+    # ── queries ─────────────────────────────────────────────────
+    def overlaps(self, room_id, start, end):
+        with self._lock:
+            return self._room(room_id).overlaps(start, end)
+
+    def busy(self, room_id, start, end):
+        """List of (start, end, booking_id) overlapping [start, end)."""
+        with self._lock:
+            return self._room(room_id).busy(start, end)
+
+    def free(self, room_id, start, end):
+        """Free gaps inside [start, end) as a list of (start, end)."""
+        with self._lock:
+            return self._room(room_id).free(start, end)
+
+    def next_free(self, room_id, after, duration):
+        """Earliest start >= ``after`` where ``duration`` fits without overlap."""
+        start = after
+        while True:
+            conflicts = self.busy(room_id, start, start + duration)
+            if not conflicts:
+                return start
+            start = max(e for _, e, _ in conflicts)
+
+    def is_free(self, room_id, start, end, exclude_id=None):
+        """In-memory overlap check — this process's view, see the module docstring."""
+        return not any(b != exclude_id for _, _, b in self.busy(room_id, start, end))
+
+
+room_index = RoomIntervalIndex()
@@ -0,0 +1,71 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from booking.intervals import RoomIntervalIndex
+from booking.models import Booking
+
+
+def _per_call(seconds, n):
+    return f"{seconds / n * 1e6:9.1f} us"
+
+
+class Command(BaseCommand):
+    help = ("Compare overlap checks through the interval index with the .exists() query, "
+            "on random upcoming slots of one room. Read-only.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room", type=int, help="Room id (default: the room with the most bookings).")
+        parser.add_argument("--probes", type=int, default=2000)
+        parser.add_argument("--days", type=int, default=60, help="Probe slots within the next N days.")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        room_id = options["room"] or (
+            Booking.objects.values("room_id").annotate(n=Count("id")).order_by("-n")
+            .values_list("room_id", flat=True).first()
+        )
+        if room_id is None:
+            raise CommandError("No bookings to probe.")
+        rng = random.Random(options["seed"])
+        now = timezone.now()
+        probes = []
+        for _ in range(options["probes"]):
+            start = now + timedelta(minutes=15 * rng.randrange(options["days"] * 96))
+            probes.append((start, start + timedelta(minutes=30)))
+
+        index = RoomIntervalIndex()
+        started = time.perf_counter()
+        index.overlaps(room_id, now, now)
+        load = time.perf_counter() - started
+
+        started = time.perf_counter()
+        db = [Booking.objects.filter(room_id=room_id, start__lt=e, end__gt=s).exists() for s, e in probes]
+        db_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        mem = [not index.is_free(room_id, s, e) for s, e in probes]
+        mem_time = time.perf_counter() - started
+
+        # Keep-in-sync cost of a save / delete, on made-up bookings.
+        fake = [Booking(pk=-n - 1, room_id=room_id, start=s, end=e) for n, (s, e) in enumerate(probes)]
+        started = time.perf_counter()
+        for b in fake:
+            index.apply(b)
+        apply_time = time.perf_counter() - started
+        started = time.perf_counter()
+        for b in fake:
+            index.discard(b.pk)
+        discard_time = time.perf_counter() - started
+
+        n = len(probes)
+        held = len(index._rooms[room_id].items)
+        self.stdout.write(f"room {room_id}: {held} upcoming bookings indexed, loaded in {load * 1000:.1f} ms")
+        self.stdout.write(f".exists() query  {_per_call(db_time, n)} per check")
+        self.stdout.write(f"interval index   {_per_call(mem_time, n)} per check")
+        self.stdout.write(f"apply / discard  {_per_call(apply_time, n)} / {_per_call(discard_time, n)}")
+        self.stdout.write(f"{sum(db)} of {n} probes taken; answers differ on {sum(a != b for a, b in zip(db, mem))}")
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from booking.rollups import booked_months, close_period, rebuild_open_periods
+from booking.utils import month_of
+
+
+def _month(value):
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise CommandError(f"Invalid month (expected YYYY-MM): {value}")
+
+
+class Command(BaseCommand):
+    help = "Close billing months: rebuild their rollups from bookings and freeze them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("month", nargs="?", help="Month to close, YYYY-MM.")
+        parser.add_argument("--through", help="Close every booked month up to and including YYYY-MM.")
+        parser.add_argument("--rebuild-open", action="store_true",
+                            help="Only rebuild the rollups of months that are still open.")
+
+    def handle(self, *args, **options):
+        if options["rebuild_open"]:
+            months = rebuild_open_periods()
+            self.stdout.write(f"Rebuilt {len(months)} open month(s).")
+            return
+
+        if options["through"]:
+            last = _month(options["through"])
+            months = [m for m in booked_months() if m <= last]
+        elif options["month"]:
+            months = [_month(options["month"])]
+        else:
+            raise CommandError("Give a month (YYYY-MM), --through YYYY-MM or --rebuild-open.")
+
+        current = month_of(timezone.localdate())
+        for month in months:
+            if month >= current:
+                self.stderr.write(f"Skipping {month:%Y-%m}: the month is not over yet.")
+                continue
+            _, created = close_period(month)
+            self.stdout.write(f"{month:%Y-%m}: {'closed' if created else 'already closed'}.")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from booking.sync import TOMBSTONE_RETENTION, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        f"Delete booking tombstones older than {TOMBSTONE_RETENTION.days} days "
+        "(sync tokens that old get a 410 and reload everything)."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Deleted {prune_tombstones()} tombstone(s).")
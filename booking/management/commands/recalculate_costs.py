@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.billing import recalculate_costs
+from booking.models import Room
+from booking.utils import as_date
+
+
+class Command(BaseCommand):
+    help = "Recompute booking total_cost from current room rates in one set-based UPDATE."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room", type=int, help="Room id (default: all rooms).")
+        parser.add_argument("--from", dest="date_from", help="First local date, YYYY-MM-DD.")
+        parser.add_argument("--to", dest="date_to", help="Last local date, YYYY-MM-DD.")
+        parser.add_argument("--future", action="store_true", help="Only bookings starting from now.")
+        parser.add_argument("--pending", action="store_true", help="Only Pending bookings.")
+
+    def handle(self, *args, **options):
+        if options["room"] and not Room.objects.filter(pk=options["room"]).exists():
+            raise CommandError(f"Room {options['room']} does not exist.")
+        for key in ("date_from", "date_to"):
+            if options[key] and not as_date(options[key]):
+                raise CommandError(f"Invalid date: {options[key]}")
+        result = recalculate_costs(
+            room=options["room"],
+            date_from=options["date_from"], date_to=options["date_to"],
+            future_only=options["future"], pending_only=options["pending"],
+        )
+        self.stdout.write(f"Updated {result['rows']} booking(s) in {result['elapsed'] * 1000:.1f} ms.")
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking.export_jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued export jobs (use --loop to keep polling)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                done = run_pending_jobs()
+            except Exception as exc:
+                self.stderr.write(f"Export job failed: {exc}")
+                done = 0
+            if done:
+                self.stdout.write(f"Finished {done} export job(s).")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-18 01:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0010_booking_hours_used_booking_total_cost_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['start', 'end'], name='booking_start_end_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.7 on 2026-10-18 01:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0011_booking_start_end_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'start', 'end'], name='booking_room_start_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status'], name='booking_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['created_by', 'start'], name='booking_creator_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['is_deleted', 'id'], name='chat_deleted_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordchangerequest',
+            index=models.Index(fields=['approved', 'notified'], name='pwreq_approved_notified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'is_done', 'due_date'], name='todo_user_done_due_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.7 on 2026-10-18 01:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_rollups(apps, schema_editor):
+    """Seed every month as open from the existing bookings."""
+    Booking = apps.get_model('booking', 'Booking')
+    BillingRollup = apps.get_model('booking', 'BillingRollup')
+    totals = {}
+    rows = Booking.objects.values_list('start', 'room_id', 'created_by_id', 'hours_used', 'total_cost')
+    for start, room_id, user_id, hours, cost in rows.iterator(chunk_size=5000):
+        key = (timezone.localtime(start).date().replace(day=1), room_id, user_id)
+        n, h, c = totals.get(key, (0, 0, 0))
+        totals[key] = (n + 1, h + hours, c + cost)
+    BillingRollup.objects.bulk_create(
+        [
+            BillingRollup(month=month, room_id=room_id, user_id=user_id, bookings=n, hours=h, revenue=c)
+            for (month, room_id, user_id), (n, h, c) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0013_changeversion_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month (local time)', unique=True)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closed_billing_periods', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BillingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month (local time)')),
+                ('bookings', models.IntegerField(default=0)),
+                ('hours', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='billing_rollups', to='booking.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='billing_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='billingrollup',
+            constraint=models.UniqueConstraint(fields=('month', 'room', 'user'), name='billing_rollup_month_room_user'),
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.7 on 2026-10-18 01:50
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_occupancy(apps, schema_editor):
+    """Seed minutes booked per room, local date and hour from the existing bookings."""
+    Booking = apps.get_model('booking', 'Booking')
+    RoomHourOccupancy = apps.get_model('booking', 'RoomHourOccupancy')
+    totals = {}
+    rows = Booking.objects.exclude(status='Rejected').values_list('room_id', 'start', 'end')
+    for room_id, start, end in rows.iterator(chunk_size=5000):
+        cursor, end = timezone.localtime(start), timezone.localtime(end)
+        while cursor < end:
+            boundary = min(cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1), end)
+            key = (room_id, cursor.date(), cursor.hour)
+            m, n = totals.get(key, (0, 0))
+            totals[key] = (m + int((boundary - cursor).total_seconds() // 60), n + 1)
+            cursor = boundary
+    RoomHourOccupancy.objects.bulk_create(
+        [
+            RoomHourOccupancy(room_id=room_id, date=day, hour=hour, minutes=m, bookings=n)
+            for (room_id, day, hour), (m, n) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0014_billing_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomHourOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('minutes', models.IntegerField(default=0)),
+                ('bookings', models.IntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hour_occupancy', to='booking.room')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='roomhouroccupancy',
+            constraint=models.UniqueConstraint(fields=('date', 'room', 'hour'), name='room_hour_occupancy_date_room_hour'),
+        ),
+        migrations.RunPython(fill_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-18 01:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0015_room_hour_occupancy'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'end', 'start'], name='booking_room_end_start_idx'),
+        ),
+    ]
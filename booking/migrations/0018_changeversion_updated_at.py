@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0017_booking_series'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changeversion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
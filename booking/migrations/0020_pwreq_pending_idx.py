@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-18 02:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0019_booking_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='passwordchangerequest',
+            name='pwreq_approved_notified_idx',
+        ),
+        migrations.AddIndex(
+            model_name='passwordchangerequest',
+            index=models.Index(condition=models.Q(('approved', False)), fields=['requested_at'], name='pwreq_pending_idx'),
+        ),
+    ]
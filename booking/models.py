@@ -1,8 +1,13 @@
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from .utils import compute_cost, compute_hours
+
 
 # ─── ROOM ────────────────────────────────────────────────────────────────────
 class Room(models.Model):
@@ -40,7 +45,37 @@ def create_profile(sender, instance, created, **kwargs):
         Profile.objects.get_or_create(user=instance)
 
 
+# ─── 🆕 BOOKING SERIES (recurring bookings) ──────────────────────────────────
+class BookingSeries(models.Model):
+    """Recurrence rule shared by the bookings it generated (see ``recurrence.py``)."""
+    FREQ_CHOICES = [
+        ("DAILY",  "Daily"),
+        ("WEEKLY", "Weekly"),
+    ]
+
+    freq          = models.CharField(max_length=10, choices=FREQ_CHOICES)
+    interval      = models.PositiveSmallIntegerField(default=1, help_text="Every N days / weeks")
+    weekdays      = models.CharField(max_length=13, blank=True, help_text="Weekly: e.g. 0,2,4 (Mon=0)")
+    until         = models.DateField(blank=True, null=True)
+    count         = models.PositiveSmallIntegerField(blank=True, null=True)
+    skip_holidays = models.BooleanField(default=True)
+    created_by    = models.ForeignKey(User, on_delete=models.CASCADE, related_name='booking_series')
+    created_at    = models.DateTimeField(auto_now_add=True)
+
+    def weekday_list(self):
+        return [int(d) for d in self.weekdays.split(',') if d.strip()]
+
+    def __str__(self):
+        every = f"every {self.interval} " if self.interval > 1 else ""
+        return f"{self.get_freq_display()} {every}series #{self.pk}"
+
+
 # ─── BOOKING ─────────────────────────────────────────────────────────────────
+# Longest booking allowed. Window queries (end > a AND start < b) can then
+# also bound start >= a - MAX_BOOKING_DURATION and stay a short index range.
+MAX_BOOKING_DURATION = timedelta(days=31)
+
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ("Pending",  "Pending"),
@@ -61,16 +96,72 @@ class Booking(models.Model):
     hours_used = models.DecimalField(max_digits=6,  decimal_places=2, default=0)
     total_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    # 🆕 Recurring bookings — set when created from a BookingSeries
+    series     = models.ForeignKey(BookingSeries, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='bookings', db_index=False)
+
+    # 🆕 Delta sync (/api/bookings/changes/) — null on rows last written before these existed.
+    # queryset.update() does not touch auto_now: pass updated_at=Now() along.
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Calendar window lookups: end > window_start AND start < window_end
+            models.Index(fields=['start', 'end'], name='booking_start_end_idx'),
+            # Per-room overlap checks: room = ? AND start < ? AND end > ?
+            models.Index(fields=['room', 'start', 'end'], name='booking_room_start_end_idx'),
+            # Availability sweeps over upcoming windows: room = ? AND end > now-ish
+            models.Index(fields=['room', 'end', 'start'], name='booking_room_end_start_idx'),
+            # Admin status counts
+            models.Index(fields=['status'], name='booking_status_idx'),
+            # "My bookings" by date
+            models.Index(fields=['created_by', 'start'], name='booking_creator_start_idx'),
+            # "This and following" occurrences of a series
+            models.Index(fields=['series', 'start'], name='booking_series_start_idx'),
+            # Delta sync: updated_at > token
+            models.Index(fields=['updated_at'], name='booking_updated_at_idx'),
+        ]
+
+    # Fields whose previous values the save/delete receivers need (rollups, heatmap).
+    TRACKED_FIELDS = ('room_id', 'created_by_id', 'start', 'end', 'status', 'hours_used', 'total_cost')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def tracked_values(self):
+        return {f: getattr(self, f) for f in self.TRACKED_FIELDS}
+
+    @property
+    def previous_values(self):
+        """Tracked fields as last loaded or saved; None for an unsaved booking."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or not all(f in loaded for f in self.TRACKED_FIELDS):
+            return None
+        return {f: loaded[f] for f in self.TRACKED_FIELDS}
+
+    def clean(self):
+        if self.start and self.end and self.end - self.start > MAX_BOOKING_DURATION:
+            raise ValidationError({'end': f"A booking can last at most {MAX_BOOKING_DURATION.days} days."})
+
     def save(self, *args, **kwargs):
+        if not self._state.adding and self.pk and self.previous_values is None:
+            # Built by hand or loaded with .only()/.defer(): fetch what the row holds now.
+            self._loaded_values = (
+                Booking.objects.filter(pk=self.pk).values(*self.TRACKED_FIELDS).first() or {}
+            )
         if self.start and self.end:
-            delta = (self.end - self.start).total_seconds() / 3600
-            self.hours_used = round(delta, 2)
-            try:
-                room = Room.objects.get(pk=self.room_id)
-                self.total_cost = round(float(self.hours_used) * float(room.price_per_hour), 2)
-            except Room.DoesNotExist:
-                self.total_cost = 0
+            self.hours_used = compute_hours(self.start, self.end)
+            if Booking.room.is_cached(self):
+                rate = self.room.price_per_hour
+            else:
+                rate = Room.objects.filter(pk=self.room_id).values_list('price_per_hour', flat=True).first()
+            self.total_cost = compute_cost(self.hours_used, rate) if rate is not None else 0
         super().save(*args, **kwargs)
+        self._loaded_values = self.tracked_values()
 
     def display_color(self):
         return self.color or getattr(self.created_by.profile, 'color', '#6366F1')
@@ -79,6 +170,18 @@ class Booking(models.Model):
         return f"{self.title} ({self.room})"
 
 
+@receiver(post_save, sender=Booking)
+def index_booking(sender, instance, **kwargs):
+    from .intervals import room_index
+    room_index.apply(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def unindex_booking(sender, instance, **kwargs):
+    from .intervals import room_index
+    room_index.discard(instance.pk)
+
+
 # ─── TRIP ────────────────────────────────────────────────────────────────────
 class Trip(models.Model):
     destination = models.CharField(max_length=200)
@@ -109,10 +212,28 @@ class PasswordChangeRequest(models.Model):
     requested_at = models.DateTimeField(auto_now_add=True)
     notified     = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Pending requests. Partial, because approved=False compiles to
+            # NOT "approved", which SQLite cannot look up in a plain index.
+            models.Index(fields=['requested_at'], condition=models.Q(approved=False), name='pwreq_pending_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} — {'Approved' if self.approved else 'Pending'}"
 
 
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=PasswordChangeRequest)
+@receiver(post_delete, sender=PasswordChangeRequest)
+def bump_notifications_version(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    from .versions import bump_version_on_commit
+    bump_version_on_commit('notifications')
+
+
 # ─── 🆕 TODO LIST ─────────────────────────────────────────────────────────────
 class Todo(models.Model):
     PRIORITY_CHOICES = [
@@ -130,6 +251,9 @@ class Todo(models.Model):
 
     class Meta:
         ordering = ['is_done', '-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_done', 'due_date'], name='todo_user_done_due_idx'),
+        ]
 
     def __str__(self):
         return f"[{self.user.username}] {self.title}"
@@ -144,6 +268,10 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Chat polling: is_deleted = False AND id > ?
+            models.Index(fields=['is_deleted', 'id'], name='chat_deleted_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.message[:50]}"
@@ -172,3 +300,192 @@ class FutureProject(models.Model):
 
     def __str__(self):
         return self.title
+
+
+# ─── CHANGE VERSION ───────────────────────────────────────────────────────────
+class ChangeVersion(models.Model):
+    """Monotonic per-resource counter, bumped whenever that resource changes."""
+    key        = models.CharField(max_length=50, unique=True)
+    version    = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)      # time of the last bump (Last-Modified)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def bump_bookings_version(sender, **kwargs):
+    from .versions import bump_version_on_commit
+    bump_version_on_commit('bookings')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Profile)
+def bump_users_version(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return      # every login saves last_login; nothing we count changed
+    from .versions import bump_version_on_commit
+    bump_version_on_commit('users')
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def bump_holidays_version(sender, **kwargs):
+    from .versions import bump_version_on_commit
+    bump_version_on_commit('holidays')
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def bump_rooms_version(sender, **kwargs):
+    from .versions import bump_version_on_commit
+    bump_version_on_commit('rooms')      # room catalog (catalog.py)
+
+
+# ─── EXPORT JOB ───────────────────────────────────────────────────────────────
+class ExportJob(models.Model):
+    KIND_CHOICES = [
+        ("bookings", "Bookings"),
+        ("billing",  "Billing"),
+    ]
+    FORMAT_CHOICES = [
+        ("xlsx", "Excel"),
+        ("csv",  "CSV"),
+    ]
+    STATUS_CHOICES = [
+        ("Queued",  "Queued"),
+        ("Running", "Running"),
+        ("Done",    "Done"),
+        ("Failed",  "Failed"),
+    ]
+    kind           = models.CharField(max_length=20, choices=KIND_CHOICES, default="bookings")
+    file_format    = models.CharField(max_length=4, choices=FORMAT_CHOICES, default="xlsx")
+    date_from      = models.DateField(blank=True, null=True)
+    date_to        = models.DateField(blank=True, null=True)
+    status         = models.CharField(max_length=10, choices=STATUS_CHOICES, default="Queued")
+    rows_total     = models.PositiveIntegerField(default=0)
+    rows_written   = models.PositiveIntegerField(default=0)
+    file           = models.FileField(upload_to='exports/', blank=True)
+    # ChangeVersion('bookings') / ('users') the file was generated from — reused while both are unchanged
+    source_version = models.PositiveBigIntegerField(default=0)
+    users_version  = models.PositiveBigIntegerField(default=0)
+    error          = models.TextField(blank=True)
+    requested_by   = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs')
+    created_at     = models.DateTimeField(auto_now_add=True)
+    started_at     = models.DateTimeField(blank=True, null=True)
+    finished_at    = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def progress(self):
+        if self.status == "Done":
+            return 100
+        return int(self.rows_written * 100 / self.rows_total) if self.rows_total else 0
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.status})"
+
+
+# ─── BILLING ROLLUP ───────────────────────────────────────────────────────────
+class BillingPeriod(models.Model):
+    """A closed billing month; its rollups are no longer touched by booking changes."""
+    month     = models.DateField(unique=True, help_text="First day of the month (local time)")
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True,
+                                  related_name='closed_billing_periods')
+
+    class Meta:
+        ordering = ['-month']
+
+    def __str__(self):
+        return self.month.strftime("%B %Y")
+
+
+class BillingRollup(models.Model):
+    """Bookings, hours and revenue per month × room × user (see ``rollups.py``)."""
+    month    = models.DateField(help_text="First day of the month (local time)")
+    room     = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='billing_rollups')
+    user     = models.ForeignKey(User, on_delete=models.CASCADE, related_name='billing_rollups')
+    bookings = models.IntegerField(default=0)
+    hours    = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue  = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'room', 'user'], name='billing_rollup_month_room_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.room_id}/{self.user_id}"
+
+
+@receiver(post_save, sender=Booking)
+def rollup_booking_save(sender, instance, created, **kwargs):
+    from .rollups import apply_booking_change
+    apply_booking_change(None if created else instance.previous_values, instance.tracked_values())
+
+
+@receiver(post_delete, sender=Booking)
+def rollup_booking_delete(sender, instance, **kwargs):
+    from .rollups import apply_booking_change
+    apply_booking_change(instance.previous_values or instance.tracked_values(), None)
+
+
+# ─── ROOM HOUR OCCUPANCY ──────────────────────────────────────────────────────
+class RoomHourOccupancy(models.Model):
+    """Minutes booked per room, local date and hour (see ``heatmap.py``)."""
+    room     = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='hour_occupancy')
+    date     = models.DateField()
+    hour     = models.PositiveSmallIntegerField()
+    minutes  = models.IntegerField(default=0)
+    bookings = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Leads with date so a month's heatmap is one index range scan.
+            models.UniqueConstraint(fields=['date', 'room', 'hour'], name='room_hour_occupancy_date_room_hour'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_id} {self.date} {self.hour:02d}:00 {self.minutes}m"
+
+
+@receiver(post_save, sender=Booking)
+def occupancy_booking_save(sender, instance, created, **kwargs):
+    from .heatmap import apply_booking_change
+    apply_booking_change(None if created else instance.previous_values, instance.tracked_values())
+
+
+@receiver(post_delete, sender=Booking)
+def occupancy_booking_delete(sender, instance, **kwargs):
+    from .heatmap import apply_booking_change
+    apply_booking_change(instance.previous_values or instance.tracked_values(), None)
+
+
+# ─── 🆕 BOOKING TOMBSTONE (delta sync) ────────────────────────────────────────
+class BookingTombstone(models.Model):
+    """
+    Record of a deleted booking, so ``/api/bookings/changes/`` can report
+    deletions. Kept for ``sync.TOMBSTONE_RETENTION``, then pruned.
+    """
+    booking_id = models.BigIntegerField()
+    room_id    = models.BigIntegerField(blank=True, null=True)     # not a FK: the room may be gone too
+    start      = models.DateTimeField(blank=True, null=True)
+    end        = models.DateTimeField(blank=True, null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Booking #{self.booking_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+@receiver(post_delete, sender=Booking)
+def tombstone_booking(sender, instance, **kwargs):
+    BookingTombstone.objects.create(
+        booking_id=instance.pk, room_id=instance.room_id, start=instance.start, end=instance.end,
+    )
@@ -0,0 +1,207 @@
+"""
+Recurring bookings (``BookingSeries``).
+
+``occurrences`` expands an RRULE-like rule — daily or weekly, every N
+days/weeks, optional weekdays, ending at ``until`` and/or after ``count``
+occurrences — into ``(start, end)`` pairs in memory; holidays are skipped
+and do not use up ``count``.
+
+The writes are set-based:
+
+* ``create_series`` checks every occurrence against the room's stored
+  bookings with one range query (``services.find_conflicts``) and inserts
+  them with one ``bulk_create`` (``services.bulk_create_bookings``).
+* ``update_following`` changes "this and following" occurrences with one
+  UPDATE per room, reading the rows' previous values once and applying
+  the billing rollup and hour occupancy deltas, the interval index,
+  ``updated_at`` and the 'bookings' version itself, since ``update()``
+  skips the Booking signals.
+* ``cancel_following`` deletes them with ``QuerySet.delete()``, whose
+  per-booking ``post_delete`` signals do that bookkeeping (and write the
+  tombstones), as for a single delete.
+"""
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from . import heatmap, rollups
+from .intervals import room_index
+from .models import Booking, BookingSeries, Holiday, Room
+from .services import BookingConflict, bulk_create_bookings, find_conflicts, lock_room, lock_rooms
+from .utils import compute_cost, compute_hours
+from .versions import bump_version_on_commit
+
+MAX_OCCURRENCES = 200
+MAX_INTERVAL    = 52
+
+
+class EmptySeries(Exception):
+    """A series would create no bookings: all its dates are holidays or taken."""
+
+
+def _conflict_message(bookings, total):
+    dates = ", ".join(f"{timezone.localtime(b.start):%b %d}" for b in bookings[:5])
+    more = f" and {len(bookings) - 5} more" if len(bookings) > 5 else ""
+    return f"{len(bookings)} of {total} dates are already booked: {dates}{more}."
+
+
+def occurrences(start, end, freq, interval=1, weekdays=None, until=None, count=None, skip=()):
+    """
+    ``[(start, end)]`` of a series whose first occurrence is ``start``..``end``.
+
+    ``weekdays`` (Mon=0) applies to weekly series and defaults to the
+    weekday of ``start``; ``until`` is a local date (inclusive). Dates in
+    ``skip`` are left out. At most ``MAX_OCCURRENCES`` are returned.
+    """
+    if until is None and not count:
+        raise ValueError("A series needs an end date or a number of occurrences.")
+    first = timezone.localtime(start)
+    duration = end - start
+    limit = min(count or MAX_OCCURRENCES, MAX_OCCURRENCES)
+    weekdays = set(weekdays or [first.weekday()])
+    monday = first.date() - timedelta(days=first.weekday())
+
+    out, day = [], first.date()
+    while len(out) < limit and (until is None or day <= until):
+        if freq == "DAILY":
+            due = (day - first.date()).days % interval == 0
+        else:
+            due = day.weekday() in weekdays and ((day - monday).days // 7) % interval == 0
+        if due and day not in skip:
+            occurrence = timezone.make_aware(datetime.combine(day, first.time()), first.tzinfo)
+            out.append((occurrence, occurrence + duration))
+        day += timedelta(days=1)
+    return out
+
+
+def series_occurrences(series, start, end):
+    """``occurrences`` of a ``BookingSeries``, skipping Holidays if it says so."""
+    skip = ()
+    if series.skip_holidays:
+        last = series.until or timezone.localdate(start) + timedelta(weeks=MAX_OCCURRENCES * series.interval)
+        skip = set(Holiday.objects.filter(date__gte=timezone.localdate(start), date__lte=last)
+                   .values_list('date', flat=True))
+    return occurrences(
+        start, end, series.freq, series.interval, series.weekday_list(),
+        until=series.until, count=series.count, skip=skip,
+    )
+
+
+# ── create ──────────────────────────────────────────────────────
+def create_series(booking, series, skip_conflicts=False):
+    """
+    Save ``series`` and one booking per occurrence, using the unsaved
+    ``booking`` (room, title, attendees, times, created_by) as the first.
+
+    Raises ``BookingConflict`` if any occurrence overlaps an existing
+    booking, unless ``skip_conflicts`` is set, in which case those dates
+    are left out. Raises ``EmptySeries``, saving nothing, if no date is
+    left. Returns ``(created bookings, skipped bookings)``.
+    """
+    times = series_occurrences(series, booking.start, booking.end)
+    if not times:
+        raise EmptySeries("Every date of this series falls on a holiday, so nothing was booked.")
+    with transaction.atomic():
+        lock_room(booking.room_id)
+        bookings = [
+            Booking(
+                room_id=booking.room_id, title=booking.title, attendees=booking.attendees,
+                color=booking.color, status=booking.status, created_by=booking.created_by,
+                start=start, end=end, series=series,
+            )
+            for start, end in times
+        ]
+        conflicts = find_conflicts(bookings)
+        if conflicts and not skip_conflicts:
+            raise BookingConflict(_conflict_message(conflicts, len(bookings)))
+        if len(conflicts) == len(bookings):
+            raise EmptySeries("Every date of this series is already booked, so nothing was booked.")
+        series.save()
+        taken = {id(b) for b in conflicts}
+        created = bulk_create_bookings([b for b in bookings if id(b) not in taken])
+    return created, conflicts
+
+
+# ── this and following ──────────────────────────────────────────
+def following(booking):
+    """``booking`` and the later occurrences of its series (just ``booking`` if it has none)."""
+    if booking.series_id is None:
+        return Booking.objects.filter(pk=booking.pk)
+    return Booking.objects.filter(series_id=booking.series_id, start__gte=booking.start)
+
+
+def update_following(booking, title=None, attendees=None, room=None, start=None, end=None):
+    """
+    Edit ``booking`` and the later occurrences of its series at once.
+
+    ``start``/``end`` are the new times of ``booking``; every later
+    occurrence moves by the same amount and takes the same length.
+    ``room`` moves them all to that room. Raises ``BookingConflict`` if a
+    moved occurrence would overlap another booking. Returns the row count.
+    """
+    retime = start is not None or end is not None
+    start = start or booking.start
+    end = end or start + (booking.end - booking.start)
+    shift, duration = start - booking.start, end - start
+    fields = {'updated_at': Now()}
+    if title is not None:
+        fields['title'] = title
+    if attendees is not None:
+        fields['attendees'] = attendees
+
+    with transaction.atomic():
+        rows = list(following(booking).values('id', *Booking.TRACKED_FIELDS))
+        old_rooms = {v['room_id'] for v in rows}
+        moved = room is not None or (retime and (shift or any(v['end'] - v['start'] != duration for v in rows)))
+        if not moved:
+            if len(fields) == 1:
+                return len(rows)
+            updated = following(booking).update(**fields)
+            bump_version_on_commit('bookings')
+            return updated
+
+        lock_rooms(old_rooms | ({room.pk} if room is not None else set()))
+        hours = compute_hours(start, end)
+        rates = dict(Room.objects.filter(pk__in=old_rooms | {getattr(room, 'pk', None)})
+                     .values_list('id', 'price_per_hour'))
+        changes = []
+        for v in rows:
+            room_id = room.pk if room is not None else v['room_id']
+            changes.append((v, dict(
+                v, room_id=room_id, start=v['start'] + shift, end=v['start'] + shift + duration,
+                hours_used=hours, total_cost=compute_cost(hours, rates[room_id]),
+            )))
+        conflicts = find_conflicts(
+            [Booking(room_id=new['room_id'], start=new['start'], end=new['end']) for _, new in changes],
+            exclude_ids=[v['id'] for v in rows],
+        )
+        if conflicts:
+            raise BookingConflict(_conflict_message(conflicts, len(rows)))
+
+        # One UPDATE per room the occurrences end up in (usually one).
+        for room_id in {new['room_id'] for _, new in changes}:
+            ids = [new['id'] for _, new in changes if new['room_id'] == room_id]
+            Booking.objects.filter(pk__in=ids).update(
+                room_id=room_id, start=F('start') + shift, end=F('start') + shift + duration,
+                hours_used=hours, total_cost=compute_cost(hours, rates[room_id]), **fields,
+            )
+        rollups.apply_booking_changes(changes)
+        heatmap.apply_booking_changes(changes)
+        touched = old_rooms | {new['room_id'] for _, new in changes}
+        transaction.on_commit(lambda: [room_index.reload(room_id) for room_id in touched])
+        bump_version_on_commit('bookings')
+    return len(rows)
+
+
+def cancel_following(booking):
+    """Delete ``booking`` and the later occurrences of its series. Returns the row count."""
+    series_id = booking.series_id
+    with transaction.atomic():
+        # QuerySet.delete() sends post_delete per booking, so the tombstones,
+        # rollups, heatmap, interval index and version are kept as for one delete.
+        _, deleted = following(booking).delete()
+        BookingSeries.objects.filter(pk=series_id, bookings__isnull=True).delete()
+    return deleted.get(Booking._meta.label, 0)
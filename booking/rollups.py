@@ -0,0 +1,135 @@
+"""
+Monthly billing rollups.
+
+``BillingRollup`` holds bookings / hours / revenue per local calendar month,
+room and user, so the billing report reads a few hundred summary rows
+instead of every booking ever made.
+
+* Open months are kept current by the Booking post_save / post_delete
+  receivers in ``models.py``: each save subtracts the booking's previous
+  values (``Booking.previous_values``) and adds the new ones, so moves
+  between rooms, users or months and resizes are exact.
+* ``close_period`` rebuilds a month from the raw bookings and records a
+  ``BillingPeriod``; from then on that month's rollups are immutable.
+* Bulk writes bypass the signals — ``services.bulk_create_bookings`` and
+  the series edits in ``recurrence`` feed their rows to
+  ``apply_booking_changes``; after any other ``queryset.update()`` call
+  ``rebuild_open_periods`` for the affected months.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Sum
+
+from .models import BillingPeriod, BillingRollup, Booking
+from .utils import CENT, month_bounds, month_of
+
+
+def closed_months(months):
+    return set(BillingPeriod.objects.filter(month__in=months).values_list('month', flat=True))
+
+
+# ── incremental updates ─────────────────────────────────────────
+def _rollup_key(values):
+    return month_of(values['start']), values['room_id'], values['created_by_id']
+
+
+def apply_booking_change(old, new):
+    """
+    Move one booking's contribution from ``old`` to ``new`` (dicts of
+    ``Booking.TRACKED_FIELDS``; ``None`` for a create or a delete).
+    Months that are already closed are left alone.
+    """
+    apply_booking_changes([(old, new)])
+
+
+def apply_booking_changes(changes):
+    """``apply_booking_change`` for many ``(old, new)`` pairs, one write per rollup row touched."""
+    deltas = {}
+    for old, new in changes:
+        for sign, values in ((-1, old), (1, new)):
+            if not values or not values['start']:
+                continue
+            count, hours, revenue = deltas.get(_rollup_key(values), (0, Decimal(0), Decimal(0)))
+            deltas[_rollup_key(values)] = (
+                count + sign,
+                hours + sign * Decimal(values['hours_used']),
+                revenue + sign * Decimal(values['total_cost']),
+            )
+    deltas = {key: d for key, d in deltas.items() if any(d)}
+    if not deltas:
+        return      # e.g. only the title or status changed
+    closed = closed_months({month for month, _, _ in deltas})
+    for (month, room_id, user_id), (count, hours, revenue) in deltas.items():
+        if month not in closed:
+            _add(month, room_id, user_id, count, hours, revenue)
+
+
+def _add(month, room_id, user_id, count, hours, revenue):
+    rollups = BillingRollup.objects.filter(month=month, room_id=room_id, user_id=user_id)
+    changes = dict(bookings=F('bookings') + count, hours=F('hours') + hours, revenue=F('revenue') + revenue)
+    if not rollups.update(**changes):
+        try:
+            with transaction.atomic():
+                BillingRollup.objects.create(
+                    month=month, room_id=room_id, user_id=user_id,
+                    bookings=count, hours=hours, revenue=revenue,
+                )
+        except IntegrityError:      # created concurrently
+            rollups.update(**changes)
+    if count < 0:
+        rollups.filter(bookings__lte=0).delete()
+
+
+# ── rebuilds / closing ──────────────────────────────────────────
+def rebuild_period(month):
+    """Recompute ``month``'s rollups from the raw bookings. Returns the row count."""
+    start, end = month_bounds(month)
+    totals = (
+        Booking.objects
+        .filter(start__gte=start, start__lt=end)
+        .order_by()
+        .values('room_id', 'created_by_id')
+        .annotate(
+            n=Count('id'),
+            hours=Sum('hours_used', output_field=DecimalField(max_digits=12, decimal_places=2)),
+            revenue=Sum('total_cost', output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+    )
+    rows = [
+        BillingRollup(
+            month=month, room_id=t['room_id'], user_id=t['created_by_id'], bookings=t['n'],
+            hours=Decimal(t['hours']).quantize(CENT), revenue=Decimal(t['revenue']).quantize(CENT),
+        )
+        for t in totals
+    ]
+    with transaction.atomic():
+        BillingRollup.objects.filter(month=month).delete()
+        BillingRollup.objects.bulk_create(rows)
+    return len(rows)
+
+
+def booked_months(bookings=None):
+    """Local months that have bookings in ``bookings`` (default: all)."""
+    bookings = Booking.objects.all() if bookings is None else bookings
+    return sorted({d.date() for d in bookings.order_by().datetimes('start', 'month')})
+
+
+def rebuild_open_periods(bookings=None):
+    """Rebuild every open month touched by ``bookings`` (default: all). Returns the months."""
+    months = booked_months(bookings)
+    closed = closed_months(months)
+    open_months = [m for m in months if m not in closed]
+    for month in open_months:
+        rebuild_period(month)
+    return open_months
+
+
+def close_period(month, user=None):
+    """Freeze ``month``: rebuild its rollups once more and mark it closed."""
+    month = month_of(month)
+    with transaction.atomic():
+        period, created = BillingPeriod.objects.get_or_create(month=month, defaults={'closed_by': user})
+        if created:
+            rebuild_period(month)
+    return period, created
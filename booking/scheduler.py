@@ -0,0 +1,132 @@
+"""
+Batch scheduling of training sessions (e.g. the sessions of a FutureProject).
+
+``solve`` places a list of ``SessionRequest`` into rooms and times:
+
+* hardest requests first (most attendees, then longest, then most
+  equipment), as in first-fit-decreasing bin packing;
+* each goes to the earliest working day where it fits at all, and on that
+  day to the best fit — the smallest room with enough ``capacity`` and
+  the equipment, then the free gap it leaves the least of (minimal
+  fragmentation), then the earliest start.
+
+Existing bookings are read with one range query into per-room
+``_RoomIntervals`` that also absorb each placement as it is made.
+``commit`` saves a solved schedule in one transaction: the rooms are
+locked, all placements are re-validated with one query
+(``find_conflicts``) and the survivors are inserted with
+``bulk_create_bookings``.
+"""
+import time
+from datetime import timedelta
+
+from django.db import transaction
+
+from .analytics import DEFAULT_HOURS
+from .availability import ceil_slot
+from .intervals import _RoomIntervals
+from .models import Booking, Holiday, Room
+from .services import bulk_create_bookings, find_conflicts, lock_rooms
+from .utils import local_day_bounds
+
+
+class SessionRequest:
+    def __init__(self, title, attendees, minutes, projector=False, speaker=False):
+        self.title     = title
+        self.attendees = attendees
+        self.duration  = timedelta(minutes=minutes)
+        self.projector = projector
+        self.speaker   = speaker
+
+    def fits(self, room):
+        return (
+            room.capacity >= self.attendees
+            and (not self.projector or room.projector == "Yes")
+            and (not self.speaker or room.speaker == "Yes")
+        )
+
+    def __repr__(self):
+        return f"<SessionRequest {self.title!r} {self.attendees}p {self.duration}>"
+
+
+class Schedule:
+    def __init__(self):
+        self.placements    = []     # [(SessionRequest, Room, start)], by start
+        self.unplaced      = []     # [SessionRequest]
+        self.solve_seconds = 0.0
+
+
+def solve(requests, date_from, date_to, hours=DEFAULT_HOURS, not_before=None):
+    """Assign rooms and start times to ``requests`` within local days ``date_from``..``date_to``."""
+    started = time.perf_counter()
+    schedule = Schedule()
+    rooms = list(Room.objects.order_by('capacity', 'name'))
+    n_days = (date_to - date_from).days + 1
+    lo, hi = local_day_bounds(date_from, n_days)
+
+    rows = {room.pk: [] for room in rooms}
+    for room_id, start, end, pk in (
+        Booking.objects.filter(start__lt=hi, end__gt=lo).values_list('room_id', 'start', 'end', 'id')
+    ):
+        rows[room_id].append((start, end, pk))
+    intervals = {room_id: _RoomIntervals(r) for room_id, r in rows.items()}
+
+    holidays = set(Holiday.objects.filter(date__range=(date_from, date_to)).values_list('date', flat=True))
+    windows = []
+    for i in range(n_days):
+        day = date_from + timedelta(days=i)
+        if day in holidays:
+            continue
+        midnight = local_day_bounds(day)[0]
+        opens, closes = midnight + timedelta(hours=hours[0]), midnight + timedelta(hours=hours[1])
+        if not_before is not None:
+            opens = max(opens, ceil_slot(not_before))
+        if opens < closes:
+            windows.append((opens, closes))
+
+    order = sorted(requests, key=lambda r: (-r.attendees, -r.duration, -(r.projector + r.speaker)))
+    for n, req in enumerate(order):
+        candidates = [room for room in rooms if req.fits(room)]
+        best = None
+        for opens, closes in windows:
+            for room in candidates:
+                for gap_start, gap_end in intervals[room.pk].free(opens, closes):
+                    start = ceil_slot(gap_start)
+                    if start + req.duration > gap_end:
+                        continue
+                    leftover = (gap_end - gap_start) - req.duration
+                    key = (room.capacity, leftover, start)
+                    if best is None or key < best[0]:
+                        best = (key, room, start)
+            if best:
+                break
+        if best is None:
+            schedule.unplaced.append(req)
+            continue
+        _, room, start = best
+        intervals[room.pk].add(start, start + req.duration, -n - 1)
+        schedule.placements.append((req, room, start))
+
+    schedule.placements.sort(key=lambda p: (p[2], p[1].name))
+    schedule.solve_seconds = time.perf_counter() - started
+    return schedule
+
+
+def commit(schedule, user, title_prefix=""):
+    """
+    Save ``schedule``'s placements in one transaction. Returns
+    ``(created bookings, conflicting placements)``; a placement conflicts
+    when someone booked its slot after ``solve`` ran.
+    """
+    bookings = [
+        Booking(
+            room=room, title=f"{title_prefix}{req.title}"[:200], attendees=req.attendees,
+            start=start, end=start + req.duration, created_by=user,
+        )
+        for req, room, start in schedule.placements
+    ]
+    with transaction.atomic():
+        lock_rooms(b.room_id for b in bookings)
+        taken = {id(b) for b in find_conflicts(bookings)}
+        created = bulk_create_bookings([b for b in bookings if id(b) not in taken])
+    return created, [p for p, b in zip(schedule.placements, bookings) if id(b) in taken]
@@ -0,0 +1,121 @@
+"""
+JSON for the API views, straight from ``values_list`` rows.
+
+``project`` turns a queryset into plain dicts from one ``values_list``
+query — no model instances — converting each value once on the way
+(``iso``, ``strftime``, ``as_float``, ``media_url``). Columns may also be
+expressions, so fallbacks such as a booking's display colour are worked
+out by the database.
+
+``dumps`` uses orjson when it is installed and the stdlib encoder
+otherwise; both give compact UTF-8. ``json_response`` sends a document,
+``stream_json_array`` sends a long array in ``STREAM_CHUNK``-row pieces
+as the rows are read, so the response is never built whole in memory.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+
+from django.db.models.expressions import BaseExpression
+from django.http import HttpResponse, StreamingHttpResponse
+
+try:
+    import orjson
+except ImportError:     # optional: the stdlib encoder is used instead
+    orjson = None
+
+STREAM_CHUNK = 500
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(obj):
+        """``obj`` as UTF-8 JSON bytes."""
+        return orjson.dumps(obj, default=_default)
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(obj):
+        """``obj`` as UTF-8 JSON bytes."""
+        return _encoder.encode(obj).encode()
+
+
+# ─── converters ────────────────────────────────────────────────
+def iso(value):
+    return value and value.isoformat()
+
+
+def strftime(fmt):
+    return lambda value: value and value.strftime(fmt)
+
+
+def as_float(value):
+    return None if value is None else float(value)
+
+
+def media_url(field, placeholder=None):
+    """Converter for a stored file name of ``field`` (a FileField) to its URL."""
+    storage = field.storage
+    return lambda name: storage.url(name) if name else placeholder
+
+
+# ─── projection ────────────────────────────────────────────────
+def project(queryset, columns, chunk_size=None):
+    """
+    Yield ``{key: value}`` for each row of ``queryset``.
+
+    ``columns`` maps output keys to a field lookup or an expression,
+    optionally paired with a converter: ``{"user": "user__username",
+    "at": ("requested_at", iso)}``. With ``chunk_size`` the rows are read
+    with ``iterator()`` rather than all at once.
+    """
+    keys, lookups, converters, annotations = [], [], [], {}
+    for i, (key, spec) in enumerate(columns.items()):
+        lookup, convert = spec if isinstance(spec, tuple) else (spec, None)
+        if isinstance(lookup, BaseExpression):
+            annotations[f"_c{i}"] = lookup
+            lookup = f"_c{i}"
+        keys.append(key)
+        lookups.append(lookup)
+        converters.append(convert)
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    rows = queryset.values_list(*lookups)
+    if chunk_size:
+        rows = rows.iterator(chunk_size=chunk_size)
+
+    converted = [(i, convert) for i, convert in enumerate(converters) if convert]
+    for row in rows:
+        if converted:
+            row = list(row)
+            for i, convert in converted:
+                row[i] = convert(row[i])
+        yield dict(zip(keys, row))
+
+
+# ─── responses ─────────────────────────────────────────────────
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), content_type="application/json", status=status)
+
+
+def _json_array_chunks(rows, chunk):
+    rows = iter(rows)
+    yield b"["
+    sep = b""
+    while batch := list(islice(rows, chunk)):
+        yield sep + dumps(batch)[1:-1]
+        sep = b","
+    yield b"]"
+
+
+def stream_json_array(rows, chunk=STREAM_CHUNK):
+    """Streaming response of the JSON array of ``rows`` (any iterable)."""
+    return StreamingHttpResponse(_json_array_chunks(rows, chunk), content_type="application/json")
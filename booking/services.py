@@ -0,0 +1,139 @@
+"""
+Booking write paths that must be safe under concurrent requests.
+"""
+import random
+import time
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from . import heatmap, rollups
+from .intervals import _RoomIntervals, room_index
+from .models import Booking, Room
+from .utils import compute_cost, compute_hours
+from .versions import bump_version_on_commit
+
+
+class BookingConflict(Exception):
+    """The requested slot overlaps an existing booking of the same room."""
+
+
+def lock_room(room_id):
+    """
+    Take a write lock scoped to one room for the current transaction.
+
+    On PostgreSQL/MySQL this is a row lock on the Room (other rooms are not
+    blocked). SQLite has no SELECT ... FOR UPDATE, so a no-op UPDATE is issued
+    as the first statement instead: it grabs SQLite's write lock up front
+    (like BEGIN IMMEDIATE) so two writers can never both pass the overlap
+    check.
+    """
+    if connection.features.has_select_for_update:
+        list(Room.objects.select_for_update().filter(pk=room_id).values_list('pk', flat=True))
+    else:
+        Room.objects.filter(pk=room_id).update(price_per_hour=F('price_per_hour'))
+
+
+def _is_lock_timeout(exc):
+    return 'locked' in str(exc) or 'deadlock' in str(exc).lower()
+
+
+def _is_taken(room_id, start, end):
+    return Booking.objects.filter(room_id=room_id, start__lt=end, end__gt=start).exists()
+
+
+def create_booking(booking, retries=5, backoff=0.05):
+    """
+    Save a new ``booking`` unless its room is already taken for that time.
+
+    An overlap this process's interval index knows about is rejected
+    before the room lock is taken (after one read confirms the index is
+    not stale). Otherwise the authoritative overlap check and the insert
+    run in one transaction under ``lock_room``. Lock timeouts are retried
+    up to ``retries`` times with jittered exponential backoff. Raises
+    ``BookingConflict`` on overlap.
+    """
+    conflict = BookingConflict(
+        f"Room {booking.room_id} is already booked between "
+        f"{booking.start:%Y-%m-%d %H:%M} and {booking.end:%H:%M}."
+    )
+    for attempt in range(retries + 1):
+        try:
+            if not room_index.is_free(booking.room_id, booking.start, booking.end):
+                if _is_taken(booking.room_id, booking.start, booking.end):
+                    raise conflict
+                room_index.reload(booking.room_id)      # freed by another process
+            with transaction.atomic():
+                lock_room(booking.room_id)
+                if _is_taken(booking.room_id, booking.start, booking.end):
+                    raise conflict
+                booking.save()
+            return booking
+        except OperationalError as exc:
+            if attempt == retries or not _is_lock_timeout(exc):
+                raise
+            # The rolled-back INSERT may have assigned a pk already.
+            booking.pk = None
+            booking._state.adding = True
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+
+def lock_rooms(room_ids):
+    """``lock_room`` for several rooms, in id order so concurrent batches cannot deadlock."""
+    for room_id in sorted(set(room_ids)):
+        lock_room(room_id)
+
+
+def find_conflicts(bookings, exclude_ids=()):
+    """
+    The unsaved ``bookings`` that overlap a stored booking or an earlier one
+    of the batch. One range query covers every room and the batch's span.
+    """
+    if not bookings:
+        return []
+    stored = {}
+    for room_id, start, end, pk in (
+        Booking.objects
+        .filter(room_id__in={b.room_id for b in bookings},
+                start__lt=max(b.end for b in bookings), end__gt=min(b.start for b in bookings))
+        .exclude(pk__in=exclude_ids)
+        .values_list('room_id', 'start', 'end', 'id')
+    ):
+        stored.setdefault(room_id, []).append((start, end, pk))
+    intervals = {room_id: _RoomIntervals(rows) for room_id, rows in stored.items()}
+
+    conflicts = []
+    for n, booking in enumerate(sorted(bookings, key=lambda b: b.start)):
+        room = intervals.setdefault(booking.room_id, _RoomIntervals())
+        if room.overlaps(booking.start, booking.end):
+            conflicts.append(booking)
+        else:
+            room.add(booking.start, booking.end, -n - 1)
+    return conflicts
+
+
+def bulk_create_bookings(bookings):
+    """
+    Insert ``bookings`` with one ``bulk_create`` and do what ``Booking.save``
+    and its receivers would have done: costs from one room-rate query,
+    billing rollups and hour occupancy as aggregated deltas, the interval
+    index (on commit) and the 'bookings' version. Run it inside the
+    transaction that validated the bookings.
+    """
+    if not bookings:
+        return []
+    rates = dict(Room.objects.filter(pk__in={b.room_id for b in bookings}).values_list('id', 'price_per_hour'))
+    for booking in bookings:
+        booking.hours_used = compute_hours(booking.start, booking.end)
+        booking.total_cost = compute_cost(booking.hours_used, rates[booking.room_id])
+    created = Booking.objects.bulk_create(bookings)
+
+    values = []
+    for booking in created:
+        booking._loaded_values = booking.tracked_values()
+        values.append((None, booking._loaded_values))
+    rollups.apply_booking_changes(values)
+    heatmap.apply_booking_changes(values)
+    transaction.on_commit(lambda: [room_index.apply(b) for b in created])
+    bump_version_on_commit('bookings')
+    return created
@@ -0,0 +1,51 @@
+/*
+ * FullCalendar adapter for the compact bookings feed
+ * (/api/bookings/?format=compact, see booking/feeds.py).
+ *
+ *   events: compactBookingsSource("/api/bookings/", "room_name,attendees")
+ */
+(function (global) {
+  'use strict';
+
+  // Compact payload -> the FullCalendar events the default feed returns.
+  function expandCompactBookings(data) {
+    const ev = data.events, rooms = data.rooms, users = data.users;
+    const events = new Array(ev.id.length);
+    for (let i = 0; i < ev.id.length; i++) {
+      const r = ev.room[i], u = ev.user[i];
+      const color = ev.color[i] || users.color[u];
+      const props = {};
+      for (const name of data.fields) {
+        if (name === 'room_name')       props.room_name = rooms.name[r];
+        else if (name === 'room_image') props.room_image = rooms.image[r];
+        else if (name === 'created_by') props.created_by = users.username[u];
+        else                            props[name] = ev[name][i];
+      }
+      events[i] = {
+        id: ev.id[i],
+        title: ev.title[i],
+        start: new Date(ev.start[i] * 1000),
+        end: new Date(ev.end[i] * 1000),
+        backgroundColor: color,
+        borderColor: color,
+        extendedProps: props,
+      };
+    }
+    return events;
+  }
+
+  // FullCalendar `events` function fetching the compact feed for the visible range.
+  function compactBookingsSource(url, fields) {
+    return function (info, success, failure) {
+      const params = new URLSearchParams({ start: info.startStr, end: info.endStr, format: 'compact' });
+      if (fields) params.set('fields', fields);
+      fetch(`${url}?${params}`, { credentials: 'same-origin' })
+        .then(resp => { if (!resp.ok) throw new Error(`HTTP ${resp.status}`); return resp.json(); })
+        .then(data => success(expandCompactBookings(data)))
+        .catch(failure);
+    };
+  }
+
+  global.expandCompactBookings = expandCompactBookings;
+  global.compactBookingsSource = compactBookingsSource;
+})(window);
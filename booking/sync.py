@@ -0,0 +1,116 @@
+"""
+Incremental booking sync for ``/api/bookings/changes/``.
+
+A sync token holds two keyset cursors, ``<microseconds>.<id>``: one over
+bookings by ``(updated_at, id)`` and one over ``BookingTombstone`` rows by
+``(deleted_at, id)``. ``booking_changes`` returns what was written or
+deleted after the cursors, at most ``MAX_CHANGES`` of each per call, so a
+client pays for the changes rather than for every booking.
+
+``updated_at`` is stamped when a row is written, not when its transaction
+commits, so a finished sync hands back cursors ``SYNC_LAG`` in the past: a
+write that commits late is still picked up, and a client may see a few
+changes twice (apply them as upserts). Tombstones are kept for
+``TOMBSTONE_RETENTION``; an older token raises ``TokenExpired`` and the
+client must reload everything.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+from .models import Booking, BookingTombstone
+
+MAX_CHANGES         = 2000
+SYNC_LAG            = timedelta(seconds=10)
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class InvalidToken(ValueError):
+    """The ``since`` token could not be parsed."""
+
+
+class TokenExpired(Exception):
+    """The token is older than the tombstones kept; a full reload is needed."""
+
+
+def _encode(moment, pk):
+    return f"{(moment - EPOCH) // MICROSECOND}.{pk}"
+
+
+def _decode(cursor):
+    micros, pk = cursor.split(".")
+    return EPOCH + int(micros) * MICROSECOND, int(pk)
+
+
+def current_token(now=None):
+    """Token to start syncing from after a full load."""
+    cursor = _encode((now or timezone.now()) - SYNC_LAG, 0)
+    return f"{cursor}-{cursor}"
+
+
+def parse_token(token):
+    try:
+        bookings, tombstones = token.split("-")
+        return _decode(bookings), _decode(tombstones)
+    except (AttributeError, ValueError, OverflowError):
+        raise InvalidToken(token) from None
+
+
+def _after(queryset, field, cursor, limit):
+    """Rows strictly after ``cursor`` in ``(field, id)`` order, at most ``limit``."""
+    moment, pk = cursor
+    return list(
+        queryset
+        .filter(**{f"{field}__gte": moment})
+        .exclude(**{field: moment, "id__lte": pk})
+        .order_by(field, "id")[:limit]
+    )
+
+
+def _next_cursor(rows, field, cursor, floor, limit):
+    # A full page continues after its last row; otherwise resume SYNC_LAG
+    # back from now, but never behind where the client already was.
+    if len(rows) == limit:
+        return (getattr(rows[-1], field), rows[-1].pk), True
+    return max(cursor, floor), False
+
+
+def booking_changes(token, room_id=None, limit=MAX_CHANGES, now=None):
+    """
+    Changes after ``token``: ``{"created": [Booking], "updated": [Booking],
+    "deleted": [BookingTombstone], "next": token, "more": bool}``.
+    ``more`` means another call with ``next`` returns further changes.
+    """
+    now = now or timezone.now()
+    booking_cursor, tombstone_cursor = parse_token(token)
+    if min(booking_cursor[0], tombstone_cursor[0]) < now - TOMBSTONE_RETENTION:
+        raise TokenExpired(token)
+
+    bookings = Booking.objects.select_related('created_by__profile', 'room')
+    tombstones = BookingTombstone.objects.all()
+    if room_id is not None:
+        bookings = bookings.filter(room_id=room_id)
+        tombstones = tombstones.filter(room_id=room_id)
+    changed = _after(bookings, "updated_at", booking_cursor, limit)
+    deleted = _after(tombstones, "deleted_at", tombstone_cursor, limit)
+
+    floor = (now - SYNC_LAG, 0)
+    booking_next, more_bookings = _next_cursor(changed, "updated_at", booking_cursor, floor, limit)
+    tombstone_next, more_tombstones = _next_cursor(deleted, "deleted_at", tombstone_cursor, floor, limit)
+    since = booking_cursor[0]
+    return {
+        "created": [b for b in changed if b.created_at and b.created_at > since],
+        "updated": [b for b in changed if not (b.created_at and b.created_at > since)],
+        "deleted": deleted,
+        "next":    f"{_encode(*booking_next)}-{_encode(*tombstone_next)}",
+        "more":    more_bookings or more_tombstones,
+    }
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones older than ``TOMBSTONE_RETENTION``. Returns the count."""
+    cutoff = (now or timezone.now()) - TOMBSTONE_RETENTION
+    return BookingTombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
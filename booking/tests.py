@@ -0,0 +1,437 @@
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import catalog
+from .export_jobs import STALE_AFTER, STALE_ERROR, enqueue_export, fail_stale_jobs, run_job
+from .intervals import room_index
+from .models import (
+    MAX_BOOKING_DURATION, BillingRollup, Booking, BookingSeries, BookingTombstone, ChatMessage, ExportJob, Holiday,
+    PasswordChangeRequest, Room, RoomHourOccupancy, Todo,
+)
+from .recurrence import EmptySeries, cancel_following, create_series, update_following
+from .services import BookingConflict, create_booking
+from .utils import local_day_bounds
+from .versions import bump_version, current_version
+from .views import (
+    CHAT_PAGE_SIZE, CHAT_POLL_MAX, FREE_SLOTS_MAX_RESULTS, NOTIFY_MAX_WAIT, NOTIFY_POLL_INTERVAL, _poll_wait,
+)
+
+
+def reset_caches():
+    """Forget process-wide state that outlives a test's rolled-back transaction."""
+    cache.clear()
+    catalog._memo = (None, None)
+    room_index.reload()
+
+
+class DashboardQueryTests(TestCase):
+    """The dashboard's query count does not depend on how many rooms or bookings exist."""
+
+    QUERIES = 7     # session, user, rooms version, room catalog, day's bookings, trips, todos
+
+    def setUp(self):
+        reset_caches()
+        self.user = User.objects.create_user("viewer", password="x")
+        self.client.force_login(self.user)
+
+    def _fill(self, rooms, bookings_per_room):
+        day_start, _ = local_day_bounds(timezone.localdate())
+        for r in range(rooms):
+            room = Room.objects.create(name=f"Room {r}", capacity=10, price_per_hour=50)
+            for b in range(bookings_per_room):
+                owner = User.objects.create_user(f"u{r}-{b}")
+                start = day_start + timedelta(hours=8 + b)
+                Booking.objects.create(room=room, title=f"B{r}.{b}", start=start,
+                                       end=start + timedelta(hours=1), created_by=owner)
+
+    def test_one_room(self):
+        self._fill(rooms=1, bookings_per_room=1)
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse("dashboard"))
+        self.assertContains(response, "B0.0")
+
+    def test_many_rooms(self):
+        self._fill(rooms=40, bookings_per_room=3)
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse("dashboard"))
+        self.assertContains(response, "B39.2")
+
+
+class ChatPollQueryTests(TestCase):
+    """A chat poll is one query for the messages, however many there are."""
+
+    QUERIES = 3     # session, user, messages (sender name and colour joined in)
+
+    def setUp(self):
+        self.user = User.objects.create_user("chatter", password="x")
+        self.client.force_login(self.user)
+
+    def _post(self, count):
+        senders = [User.objects.create_user(f"s{n}") for n in range(min(count, 20))]
+        ChatMessage.objects.bulk_create(
+            ChatMessage(sender=senders[n % len(senders)], message=f"m{n}") for n in range(count)
+        )
+
+    def _poll(self, **params):
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse("chat_messages_api"), params)
+        return response.json()
+
+    def test_one_message(self):
+        self._post(1)
+        self.assertEqual(len(self._poll(after=0)), 1)
+
+    def test_many_messages(self):
+        self._post(500)
+        polled = self._poll(after=0)
+        self.assertEqual(len(polled), CHAT_POLL_MAX)
+        older = self._poll(before=polled[-1]["id"])
+        self.assertEqual(len(older), CHAT_PAGE_SIZE)
+
+
+class AdminNotificationsTests(TestCase):
+    """The notification long-poll: never held under WSGI, and ``?wait=`` is bounded."""
+
+    def setUp(self):
+        reset_caches()
+        self.client.force_login(User.objects.create_superuser("notified", password="x"))
+
+    def test_wsgi_request_does_not_wait(self):
+        url = reverse("admin_notifications_api")
+        version = self.client.get(url).json()["version"]
+        started = time.monotonic()
+        response = self.client.get(url, {"version": version, "wait": NOTIFY_MAX_WAIT})
+        self.assertEqual(response.status_code, 304)
+        self.assertLess(time.monotonic() - started, NOTIFY_POLL_INTERVAL)
+        # Unheld, so the page pauses before polling again rather than spinning.
+        self.assertNotIn("X-Poll-Held", response)
+
+    async def test_asgi_request_is_held(self):
+        await self.async_client.aforce_login(await User.objects.aget(username="notified"))
+        url = reverse("admin_notifications_api")
+        version = (await self.async_client.get(url)).json()["version"]
+        response = await self.async_client.get(url, {"version": version, "wait": NOTIFY_POLL_INTERVAL})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["X-Poll-Held"], "1")
+
+    def test_wait_is_finite_and_bounded(self):
+        for raw, expected in [("5", 5), ("-1", 0), ("1e9", NOTIFY_MAX_WAIT),
+                              ("nan", 0), ("inf", 0), ("-inf", 0), ("soon", 0)]:
+            self.assertEqual(_poll_wait({"wait": raw}), expected, raw)
+        self.assertEqual(_poll_wait({}), 0)
+
+
+class FreeSlotsTests(TestCase):
+    """``api_free_slots`` clamps ``?limit=`` into [1, FREE_SLOTS_MAX_RESULTS]."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("seeker", password="x"))
+        # An empty room offers one slot a day: 8 rooms x 14 days is more than the cap.
+        for n in range(8):
+            Room.objects.create(name=f"Free Room {n}", capacity=10, price_per_hour=50)
+
+    def _slots(self, limit):
+        response = self.client.get(reverse("api_free_slots"), {"duration": 30, "limit": limit})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["slots"]
+
+    def test_negative_limit(self):
+        self.assertEqual(len(self._slots(-1)), 1)
+
+    def test_limit_capped(self):
+        self.assertEqual(len(self._slots(10 ** 6)), FREE_SLOTS_MAX_RESULTS)
+
+
+class SeriesEditTests(TestCase):
+    """Creating, editing and cancelling "this and following" occurrences."""
+
+    def setUp(self):
+        reset_caches()
+        self.user = User.objects.create_user("organiser")
+        self.room = Room.objects.create(name="Series Room", capacity=10, price_per_hour=50)
+        self.start = (timezone.now() + timedelta(days=7)).replace(minute=0, second=0, microsecond=0)
+        self.bookings, _ = create_series(*self._series(skip_holidays=False))
+
+    def _series(self, **series):
+        first = Booking(room=self.room, title="Standup", start=self.start,
+                        end=self.start + timedelta(minutes=30), created_by=self.user)
+        return first, BookingSeries(**{"freq": "DAILY", "count": 4, "created_by": self.user, **series})
+
+    def test_cancel_following_keeps_bookkeeping(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cancelled = cancel_following(self.bookings[1])
+        self.assertEqual(cancelled, 3)
+        self.assertEqual(list(Booking.objects.values_list("pk", flat=True)), [self.bookings[0].pk])
+        self.assertEqual(BookingTombstone.objects.count(), 3)
+        self.assertEqual(BillingRollup.objects.get().bookings, 1)
+        self.assertEqual(sum(RoomHourOccupancy.objects.values_list("bookings", flat=True)), 1)
+        self.assertFalse(room_index.overlaps(self.room.pk, self.bookings[1].start, self.bookings[3].end))
+        self.assertTrue(BookingSeries.objects.exists())
+
+        cancel_following(self.bookings[0])
+        self.assertFalse(BookingSeries.objects.exists())
+
+    def test_fully_taken_series_saves_nothing(self):
+        with self.assertRaises(EmptySeries):
+            create_series(*self._series(skip_holidays=False), skip_conflicts=True)
+        self.assertEqual(BookingSeries.objects.count(), 1)
+
+    def test_all_holiday_series_saves_nothing(self):
+        first_day = timezone.localdate(self.start)
+        for n in range(4):
+            Holiday.objects.create(date=first_day + timedelta(days=n), name=f"H{n}")
+        with self.assertRaises(EmptySeries):
+            create_series(*self._series(count=None, until=first_day + timedelta(days=3), skip_holidays=True))
+        self.assertEqual(BookingSeries.objects.count(), 1)
+
+    def test_empty_series_is_a_form_error(self):
+        self.client.force_login(self.user)
+        local = timezone.localtime(self.start)
+        response = self.client.post(reverse("booking_create"), {
+            "room": self.room.pk, "title": "Again", "attendees": 3, "status": "Pending",
+            "start": local.strftime("%Y-%m-%dT%H:%M"),
+            "end": (local + timedelta(minutes=30)).strftime("%Y-%m-%dT%H:%M"),
+            "repeat": "DAILY", "count": 4, "skip_taken": "on",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["repeat_form"].non_field_errors(),
+                         ["Every date of this series is already booked, so nothing was booked."])
+        self.assertEqual(BookingSeries.objects.count(), 1)
+
+    def test_title_only_edit_bumps_version(self):
+        before = current_version("bookings")
+        with self.captureOnCommitCallbacks(execute=True):
+            updated = update_following(self.bookings[1], title="Retro")
+        self.assertEqual(updated, 3)
+        self.assertGreater(current_version("bookings"), before)
+        titles = list(Booking.objects.order_by("start").values_list("title", flat=True))
+        self.assertEqual(titles, ["Standup", "Retro", "Retro", "Retro"])
+
+
+class ConditionalFeedTests(TestCase):
+    """A 304 from a ``conditional_on`` feed reads only the session, the user and the counters."""
+
+    ALLOWED = {"django_session", "auth_user", "booking_changeversion"}
+    TABLE   = re.compile(r'(?:FROM|JOIN) "(\w+)"')
+
+    def setUp(self):
+        reset_caches()
+        user = User.objects.create_user("calendar", password="x")
+        self.client.force_login(user)
+        room = Room.objects.create(name="Feed Room", capacity=10, price_per_hour=50)
+        start = timezone.now().replace(microsecond=0)
+        Booking.objects.create(room=room, title="Feed", start=start, end=start + timedelta(hours=1),
+                               created_by=user)
+        Holiday.objects.create(date=timezone.localdate(), name="Feed Day")
+
+    def assertNotModifiedCheaply(self, url, params=None):
+        etag = self.client.get(url, params)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        tables = {table for q in queries for table in self.TABLE.findall(q["sql"])}
+        self.assertIn("booking_changeversion", tables)
+        self.assertLessEqual(tables, self.ALLOWED, [q["sql"] for q in queries])
+
+    def test_bookings_feed(self):
+        start = timezone.now() - timedelta(days=1)
+        self.assertNotModifiedCheaply(reverse("api_bookings"), {
+            "start": start.isoformat(), "end": (start + timedelta(days=7)).isoformat(),
+        })
+
+    def test_holidays_feed(self):
+        self.assertNotModifiedCheaply(reverse("api_ph_holidays"))
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """``create_booking`` from several threads (own connections) at once."""
+
+    WRITERS = 8
+    SLOTS   = 12
+
+    def setUp(self):
+        room_index.reload()
+        self.room = Room.objects.create(name="Stress Room", capacity=10, price_per_hour=100)
+        self.user = User.objects.create_user("stress")
+
+    def test_concurrent_writers_never_overlap(self):
+        first = (timezone.now() + timedelta(days=30)).replace(minute=0, second=0, microsecond=0)
+        # One-hour bookings every 30 minutes: each slot overlaps both neighbours.
+        slots = [first + timedelta(minutes=30 * i) for i in range(self.SLOTS)]
+        barrier = threading.Barrier(self.WRITERS)
+        errors, created = [], []
+
+        def writer(n):
+            order = slots[:]
+            random.Random(n).shuffle(order)
+            try:
+                barrier.wait()
+                for start in order:
+                    booking = Booking(room=self.room, title=f"w{n}", start=start,
+                                      end=start + timedelta(hours=1), created_by=self.user)
+                    try:
+                        create_booking(booking)
+                    except BookingConflict:
+                        continue
+                    created.append(booking.pk)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(self.WRITERS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        rows = list(Booking.objects.filter(room=self.room).order_by("start").values_list("start", "end"))
+        self.assertEqual(len(rows), len(created))
+        # No writer was turned away from a slot that stayed free.
+        for start in slots:
+            end = start + timedelta(hours=1)
+            self.assertTrue(any(s < end and e > start for s, e in rows), start)
+        overlapping = [(a, b) for a, b in zip(rows, rows[1:]) if b[0] < a[1]]
+        self.assertEqual(overlapping, [])
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite's")
+class HotQueryPlanTests(TestCase):
+    """Hot queries must be served by an index, never a full scan of a booking table."""
+
+    BARE_SCAN = re.compile(r"^SCAN booking_\w+$")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("planner")
+        cls.room = Room.objects.create(name="Plan Room")
+
+    def assertIndexed(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        scans = [line for line in plan if self.BARE_SCAN.search(line)]
+        self.assertEqual(scans, [], f"{sql}\n" + "\n".join(plan))
+
+    def test_calendar_window(self):
+        start = timezone.now()
+        end = start + timedelta(days=42)
+        self.assertIndexed(
+            Booking.objects.filter(end__gt=start, start__gte=start - MAX_BOOKING_DURATION, start__lt=end)
+            .order_by("-start")[:2000]
+        )
+
+    def test_room_conflict_check(self):
+        start = timezone.now()
+        self.assertIndexed(
+            Booking.objects.filter(room_id=self.room.pk, start__lt=start + timedelta(hours=1), end__gt=start)
+            .values("id")[:1]
+        )
+
+    def test_admin_booking_list(self):
+        self.assertIndexed(Booking.objects.select_related("room", "created_by").order_by("-start")[:26])
+
+    def test_admin_notifications(self):
+        self.assertIndexed(PasswordChangeRequest.objects.filter(approved=False, notified=False))
+        self.assertIndexed(PasswordChangeRequest.objects.filter(approved=False).values("id"))
+
+    def test_chat_poll(self):
+        self.assertIndexed(ChatMessage.objects.filter(is_deleted=False, id__gt=0).order_by("id")[:200])
+
+    def test_todo_list(self):
+        self.assertIndexed(Todo.objects.filter(user=self.user, is_done=False).order_by("due_date")[:10])
+
+
+class ExportJobTests(TestCase):
+    """Reuse, staleness and pruning of background export files."""
+
+    def setUp(self):
+        reset_caches()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media, EXPORT_JOBS_IN_PROCESS=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user("exporter")
+        room = Room.objects.create(name="Export Room", capacity=10, price_per_hour=50)
+        start = timezone.now().replace(microsecond=0)
+        Booking.objects.create(room=room, title="Exported", start=start,
+                               end=start + timedelta(hours=1), created_by=self.user)
+
+    def _export(self):
+        job = enqueue_export(self.user, "bookings", "csv")
+        if job.status == "Queued":
+            run_job(job.pk)
+            job.refresh_from_db()
+        return job
+
+    def test_reused_while_versions_unchanged(self):
+        first = self._export()
+        self.assertEqual(first.status, "Done")
+        self.assertEqual(self._export().pk, first.pk)
+
+    def test_in_flight_job_is_returned(self):
+        queued = enqueue_export(self.user, "bookings", "csv")
+        self.assertEqual(queued.status, "Queued")
+        self.assertEqual(enqueue_export(self.user, "bookings", "csv").pk, queued.pk)
+        ExportJob.objects.filter(pk=queued.pk).update(status="Running", started_at=timezone.now())
+        self.assertEqual(enqueue_export(self.user, "bookings", "csv").pk, queued.pk)
+        self.assertNotEqual(enqueue_export(self.user, "billing", "csv").pk, queued.pk)
+        self.assertEqual(ExportJob.objects.count(), 2)
+
+    def test_status_urls(self):
+        self.client.force_login(User.objects.create_superuser("boss", password="x"))
+        job = self.client.post(reverse("export_job_start"), {"kind": "bookings", "format": "csv"}).json()
+        self.assertEqual(job["status_url"], reverse("export_job_status", args=[job["id"]]))
+        self.assertIsNone(job["download_url"])
+        run_job(job["id"])
+        job = self.client.get(job["status_url"]).json()
+        self.assertEqual(job["download_url"], reverse("export_job_download", args=[job["id"]]))
+
+    def test_users_change_is_not_reused(self):
+        first = self._export()
+        bump_version("users")
+        second = self._export()
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertEqual(second.status, "Done")
+
+    def test_superseded_file_is_deleted(self):
+        first = self._export()
+        path = first.file.path
+        self.assertTrue(os.path.exists(path))
+        bump_version("bookings")
+        second = self._export()
+        first.refresh_from_db()
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(first.file.name, "")
+        self.assertTrue(os.path.exists(second.file.path))
+        self.client.force_login(User.objects.create_superuser("boss", password="x"))
+        self.assertEqual(self.client.get(reverse("export_job_download", args=[first.pk])).status_code, 404)
+
+    def test_stale_running_job_fails(self):
+        stuck = ExportJob.objects.create(kind="bookings", file_format="csv", requested_by=self.user,
+                                         status="Running", started_at=timezone.now() - STALE_AFTER * 2)
+        running = ExportJob.objects.create(kind="billing", file_format="csv", requested_by=self.user,
+                                           status="Running", started_at=timezone.now())
+        self.assertEqual(fail_stale_jobs(), 1)
+        stuck.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual((stuck.status, stuck.error), ("Failed", STALE_ERROR))
+        self.assertEqual(running.status, "Running")
@@ -33,6 +33,7 @@ urlpatterns = [
     path("bookings/new/",                    views.booking_create, name="booking_create"),
     path("bookings/",                        views.booking_list,   name="booking_list"),
     path("cancel-booking/<int:booking_id>/", views.cancel_booking, name="cancel_booking"),
+    path("bookings/series/<int:booking_id>/", views.booking_series, name="booking_series"),
     path("rooms/choose/",                    views.choose_room,    name="choose_room"),
 
     # ── Trips ─────────────────────────────────────────────────────
@@ -44,17 +45,25 @@ urlpatterns = [
 
     # ── APIs ──────────────────────────────────────────────────────
     path("api/bookings/",                    views.api_bookings,                  name="api_bookings"),
+    path("api/bookings/changes/",            views.api_booking_changes,           name="api_booking_changes"),
+    path("api/free-slots/",                  views.api_free_slots,                name="api_free_slots"),
     path("api/pending-password-requests/",   views.pending_password_requests_api, name="pending_password_requests_api"),
     path("api/pending-user-registrations/",  views.pending_user_registrations_api, name="pending_user_registrations_api"),
+    path("api/admin-notifications/",         views.admin_notifications_api,        name="admin_notifications_api"),
+    path("api/utilization/",                 views.api_utilization,                name="api_utilization"),
 
     # 🆕 Chat API
     path("chat/messages/", views.chat_messages_api,   name="chat_messages_api"),
     path("chat/send/",     views.chat_send,            name="chat_send"),
     path("chat/delete/<int:msg_id>/", views.chat_delete_message, name="chat_delete_message"),
+    path("chat/stream/",   views.chat_stream,          name="chat_stream"),
 
     # ── Admin Dashboard ───────────────────────────────────────────
     path("dashboard-admin/",                views.admin_dashboard,      name="admin_dashboard"),
     path("dashboard-admin/export-bookings/",views.export_bookings_excel, name="export_bookings"),
+    path("dashboard-admin/exports/",                      views.export_job_start,    name="export_job_start"),
+    path("dashboard-admin/exports/<int:job_id>/",         views.export_job_status,   name="export_job_status"),
+    path("dashboard-admin/exports/<int:job_id>/download/",views.export_job_download, name="export_job_download"),
     path("dashboard-admin/bookings/",       views.booking_history,      name="booking_history"),
     path("dashboard-admin/staff/",          views.staff_accounts,       name="staff_accounts"),
     path("dashboard-admin/staff/edit/<int:user_id>/", views.edit_staff, name="edit_staff"),
@@ -69,6 +78,9 @@ urlpatterns = [
     path("dashboard-admin/billing/",        views.room_billing_report, name="room_billing_report"),
     path("dashboard-admin/billing/export/", views.export_billing_excel, name="export_billing_excel"),
 
+    # 🆕 Room Utilization (Admin)
+    path("dashboard-admin/utilization/",    views.utilization_report,  name="utilization_report"),
+
     # 🆕 Todo List
     path("todos/",                         views.todo_list,   name="todo_list"),
     path("todos/create/",                  views.todo_create, name="todo_create"),
@@ -83,4 +95,5 @@ urlpatterns = [
     path("projects/create/",                      views.project_create,        name="project_create"),
     path("projects/status/<int:project_id>/",     views.project_update_status, name="project_update_status"),
     path("projects/delete/<int:project_id>/",     views.project_delete,        name="project_delete"),
+    path("projects/schedule/<int:project_id>/",   views.project_schedule,      name="project_schedule"),
 ]
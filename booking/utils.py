@@ -0,0 +1,67 @@
+from datetime import date, datetime, time, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+CENT = Decimal("0.01")
+
+
+def local_day_bounds(day, days=1):
+    """
+    Aware ``[local midnight, midnight + days)`` for a calendar date.
+
+    Filtering ``start__gte=lo, start__lt=hi`` is index-friendly, unlike
+    ``start__date=day`` which makes the database cast every row to the
+    local date before comparing.
+    """
+    lo = timezone.make_aware(datetime.combine(day, time.min))
+    hi = timezone.make_aware(datetime.combine(day + timedelta(days=days), time.min))
+    return lo, hi
+
+
+def month_of(value):
+    """First day of the local calendar month containing ``value`` (datetime or date)."""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date()
+    return value.replace(day=1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """Aware [start, end) datetimes covering the local ``month``."""
+    return local_day_bounds(month, (next_month(month) - month).days)
+
+
+def as_date(value):
+    """A ``date`` from a date or a YYYY-MM-DD string; None if empty or invalid."""
+    if not value or isinstance(value, date):
+        return value or None
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def filter_by_dates(bookings, date_from=None, date_to=None):
+    """Limit a Booking queryset to local days ``date_from``..``date_to`` (inclusive)."""
+    date_from, date_to = as_date(date_from), as_date(date_to)
+    if date_from:
+        bookings = bookings.filter(start__gte=local_day_bounds(date_from)[0])
+    if date_to:
+        bookings = bookings.filter(start__lt=local_day_bounds(date_to)[1])
+    return bookings
+
+
+def compute_hours(start, end):
+    """Booked hours as a Decimal rounded to the cent (``Booking.hours_used``)."""
+    seconds = Decimal((end - start) // timedelta(microseconds=1)) / Decimal(1_000_000)
+    return (seconds / Decimal(3600)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def compute_cost(hours, rate):
+    """``hours * rate`` rounded to the cent, in exact Decimal arithmetic."""
+    return (Decimal(hours) * Decimal(rate)).quantize(CENT, rounding=ROUND_HALF_UP)
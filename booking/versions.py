@@ -0,0 +1,77 @@
+"""
+Database-backed change counters (``ChangeVersion``).
+
+Every worker process sees the same value, so a counter can tell whether
+anything changed since a cached artifact was produced — a cached summary,
+an export file, or a client's copy of a JSON feed (``conditional_on``).
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .models import ChangeVersion
+
+
+def current_version(key):
+    return ChangeVersion.objects.filter(key=key).values_list('version', flat=True).first() or 0
+
+
+async def acurrent_version(key):
+    return await ChangeVersion.objects.filter(key=key).values_list('version', flat=True).afirst() or 0
+
+
+def current_versions(*keys):
+    """``{key: version}`` for several counters in one query."""
+    found = dict(ChangeVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return {key: found.get(key, 0) for key in keys}
+
+
+def version_stamp(*keys):
+    """``(etag, last_modified)`` of the counters ``keys``, from one query."""
+    found = {
+        key: (version, updated_at)
+        for key, version, updated_at in ChangeVersion.objects.filter(key__in=keys)
+        .values_list('key', 'version', 'updated_at')
+    }
+    etag = "-".join(f"{key}.{found.get(key, (0, None))[0]}" for key in keys)
+    last_modified = max((updated_at for _, updated_at in found.values()), default=None)
+    return etag, last_modified
+
+
+def conditional_on(*keys):
+    """
+    View decorator for conditional GETs keyed on the counters ``keys``.
+
+    The ETag and Last-Modified come from ``version_stamp`` (one query,
+    shared by both checks), so a client whose copy is current gets a 304
+    before the view runs and no other table is read. Responses are marked
+    ``private, no-cache`` so browsers revalidate on every fetch.
+    """
+    def stamp(request):
+        if not hasattr(request, '_version_stamp'):
+            request._version_stamp = version_stamp(*keys)
+        return request._version_stamp
+
+    def decorator(view):
+        view = condition(
+            etag_func=lambda request, *args, **kwargs: stamp(request)[0],
+            last_modified_func=lambda request, *args, **kwargs: stamp(request)[1],
+        )(view)
+        return cache_control(private=True, no_cache=True)(view)
+    return decorator
+
+
+def bump_version(key):
+    changes = dict(version=F('version') + 1, updated_at=timezone.now())
+    if not ChangeVersion.objects.filter(key=key).update(**changes):
+        obj, created = ChangeVersion.objects.get_or_create(key=key, defaults={'version': 1})
+        if not created:
+            ChangeVersion.objects.filter(key=key).update(**changes)
+
+
+def bump_version_on_commit(key):
+    # After commit, so the counter row is never locked for the length of a
+    # booking transaction (that would serialize writers across all rooms).
+    transaction.on_commit(lambda: bump_version(key))
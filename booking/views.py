@@ -2,19 +2,50 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.urls import reverse
+from django.core.cache import cache
+from django.db.models import BooleanField, Count, DecimalField, ExpressionWrapper, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from datetime import datetime
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 from calendar import monthrange
-from openpyxl import Workbook
 from django.contrib.auth.models import User
+import asyncio
+import csv
 import json
+import math
+import os
 
 from .models import (
     Room, Booking, Trip, Holiday, PasswordChangeRequest,
-    Todo, ChatMessage, FutureProject,
+    Todo, ChatMessage, FutureProject, ExportJob, BillingPeriod, BillingRollup,
+    MAX_BOOKING_DURATION,
 )
-from .forms import RegisterForm, BookingForm, TripForm, HolidayForm, PasswordChangeRequestForm
+from .utils import as_date, filter_by_dates, local_day_bounds, month_bounds, month_of
+from .exports import (
+    BILLING_HEADER, BOOKINGS_HEADER, ROLLUP_HEADER,
+    billing_rows, booking_rows, rollup_rows, xlsx_response,
+)
+from .analytics import DEFAULT_HOURS, occupancy, utilization_stats
+from .heatmap import room_hour_heatmap
+from .catalog import room_catalog
+from .feeds import booking_event, compact_events, event_rows, parse_fields
+from .serializers import STREAM_CHUNK, iso, json_response, project, stream_json_array, strftime
+from .availability import free_slots
+from .export_jobs import enqueue_export, fail_stale_jobs, is_stale
+from .versions import acurrent_version, conditional_on, current_versions
+from .sync import InvalidToken, TokenExpired, booking_changes, current_token
+from .chat_events import chat_broker, sse
+from .services import BookingConflict, create_booking
+from .scheduler import SessionRequest, commit as commit_schedule, solve as solve_schedule
+from .billing import recalculate_costs
+from .recurrence import EmptySeries, cancel_following, create_series, following, update_following
+from .forms import RegisterForm, BookingForm, RecurrenceForm, TripForm, HolidayForm, PasswordChangeRequestForm
 
 
 # ════════════════════════════════════════════════════════════════
@@ -87,34 +118,32 @@ def dashboard(request):
     except ValueError:
         selected_date = timezone.localdate()
 
-    rooms = Room.objects.all().order_by('id')
+    catalog = room_catalog()
+    rooms = catalog.rooms
+    # One query for the whole day, grouped per room in Python.
+    day_start, day_end = local_day_bounds(selected_date)
+    bookings_by_room = {room.id: [] for room in rooms}
+    day_bookings = (
+        Booking.objects
+        .filter(start__gte=day_start, start__lt=day_end)
+        .select_related('room', 'created_by__profile')
+        .order_by('start')
+    )
+    for b in day_bookings:
+        bookings_by_room.setdefault(b.room_id, []).append(b)
     room_bookings = [
-        {
-            'room': room,
-            'bookings': Booking.objects.filter(room=room, start__date=selected_date).order_by('start'),
-        }
+        {'room': room, 'bookings': bookings_by_room[room.id]}
         for room in rooms
     ]
     trips = Trip.objects.filter(date__gte=selected_date).order_by('date')[:10]
     todos = Todo.objects.filter(user=request.user, is_done=False).order_by('due_date')[:10]
 
-    room_data = [
-        {
-            'id': r.id, 'name': r.name, 'capacity': r.capacity,
-            'projector': r.projector, 'speaker': r.speaker,
-            'tables': r.tables, 'chairs': r.chairs,
-            'image_url': r.image.url if r.image else '/static/img/placeholder.png',
-            'price_per_hour': float(r.price_per_hour),
-        }
-        for r in rooms
-    ]
-
     return render(request, 'booking/dashboard.html', {
         'room_bookings': room_bookings,
         'selected_date': selected_date,
         'trips': trips,
         'rooms': rooms,
-        'room_data': room_data,
+        'room_data': catalog.data,
         'todos': todos,
     })
 
@@ -127,31 +156,42 @@ def dashboard(request):
 def booking_create(request):
     room_id = request.GET.get('room_id')
     form = BookingForm(request.POST or None)
+    repeat_form = RecurrenceForm(request.POST or None)
 
-    if request.method == 'POST' and form.is_valid():
+    if request.method == 'POST' and form.is_valid() and repeat_form.is_valid():
         booking = form.save(commit=False)
-        overlap = Booking.objects.filter(
-            room=booking.room,
-            start__lt=booking.end,
-            end__gt=booking.start,
-        ).exists()
-        if overlap:
-            messages.error(request, "This room is already booked for the selected time!")
+        booking.created_by = request.user
+        if repeat_form.cleaned_data['repeat']:
+            try:
+                created, skipped = create_series(
+                    booking, repeat_form.series(request.user),
+                    skip_conflicts=repeat_form.cleaned_data['skip_taken'],
+                )
+            except BookingConflict as exc:
+                messages.error(request, str(exc))
+            except EmptySeries as exc:
+                repeat_form.add_error(None, str(exc))
+            else:
+                note = f" ({len(skipped)} already-booked date(s) skipped)" if skipped else ""
+                messages.success(request, f"{len(created)} recurring bookings created{note}!")
+                return redirect('dashboard')
         else:
-            booking.created_by = request.user
-            booking.save()
-            messages.success(request, "Booking created successfully!")
-            return redirect('dashboard')
+            try:
+                create_booking(booking)
+            except BookingConflict:
+                messages.error(request, "This room is already booked for the selected time!")
+            else:
+                messages.success(request, "Booking created successfully!")
+                return redirect('dashboard')
 
+    catalog = room_catalog()
     if room_id:
-        try:
-            form.fields['room'].initial = Room.objects.get(id=room_id)
-        except Room.DoesNotExist:
-            pass
+        form.fields['room'].initial = catalog.get(room_id)
 
     return render(request, 'booking/booking_form.html', {
         'form': form,
-        'rooms': Room.objects.all().order_by('id'),
+        'repeat_form': repeat_form,
+        'rooms': catalog.rooms,
     })
 
 
@@ -170,37 +210,196 @@ def cancel_booking(request, booking_id):
     return redirect("dashboard")
 
 
+@login_required
+def booking_series(request, booking_id):
+    """Edit or cancel a recurring booking and all later occurrences of its series."""
+    booking = get_object_or_404(Booking.objects.select_related('room', 'series'), id=booking_id)
+    if booking.series_id is None:
+        messages.error(request, "This booking is not part of a series.")
+        return redirect('dashboard')
+
+    if request.method == 'POST':
+        if request.POST.get('action') == 'cancel':
+            n = cancel_following(booking)
+            messages.success(request, f"{n} booking(s) cancelled.")
+            return redirect('dashboard')
+        start = _parse_window_bound(request.POST.get('start'))
+        end   = _parse_window_bound(request.POST.get('end'))
+        room  = Room.objects.filter(pk=_int_param(request.POST, 'room')).first()
+        if start and end and end <= start:
+            messages.error(request, "The end time must be after the start time.")
+        elif start and end and end - start > MAX_BOOKING_DURATION:
+            messages.error(request, f"A booking can last at most {MAX_BOOKING_DURATION.days} days.")
+        else:
+            try:
+                n = update_following(
+                    booking,
+                    title=request.POST.get('title') or None,
+                    attendees=_int_param(request.POST, 'attendees') or None,
+                    room=room if room and room.pk != booking.room_id else None,
+                    start=start, end=end,
+                )
+            except BookingConflict as exc:
+                messages.error(request, str(exc))
+            else:
+                messages.success(request, f"{n} booking(s) updated.")
+                booking.refresh_from_db()
+
+    return render(request, 'booking/booking_series.html', {
+        'booking':  booking,
+        'series':   booking.series,
+        'bookings': following(booking).select_related('room').order_by('start'),
+        'rooms':    room_catalog().by_name,
+    })
+
+
 @login_required
 def choose_room(request):
     return render(request, 'booking/choose_room.html', {
-        'rooms': Room.objects.all().order_by('id'),
+        'rooms': room_catalog().rooms,
         'form': BookingForm(),
     })
 
 
+# Hard cap on events per calendar fetch — a month/week view never needs more.
+API_BOOKINGS_MAX_RESULTS = 2000
+
+
+def _parse_window_bound(value):
+    """Parse a FullCalendar ``start``/``end`` param (date or ISO datetime) into an aware datetime."""
+    if not value:
+        return None
+    # An unencoded "+08:00" offset arrives as " 08:00".
+    value = value.strip().replace(' ', '+')
+    try:
+        dt = parse_datetime(value)
+        if dt is None:
+            d = parse_date(value)
+            if d is None:
+                return None
+            dt = datetime.combine(d, time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
 @login_required
+@conditional_on('bookings', 'users')
 def api_bookings(request):
-    events = [
-        {
-            'id': b.id,
-            'title': b.title,
-            'start': b.start.isoformat(),
-            'end': b.end.isoformat(),
-            'backgroundColor': b.display_color(),
-            'borderColor':     b.display_color(),
-            'extendedProps': {
-                'room_name':   b.room.name,
-                'created_by':  b.created_by.username,
-                'attendees':   b.attendees,
-                'room_image':  b.room.image.url if b.room.image else '/static/img/placeholder.png',
-                'total_cost':  float(b.total_cost),
-                'hours_used':  float(b.hours_used),
-                'status':      b.status,
-            },
-        }
-        for b in Booking.objects.select_related('created_by', 'room').order_by('-start')
-    ]
-    return JsonResponse(events, safe=False)
+    """
+    Calendar feed — only bookings overlapping the visible [start, end) window.
+    Conditional on the 'bookings' and 'users' versions (names, colours).
+    ``?format=compact`` and ``?fields=`` select the encoding (``feeds.py``).
+    """
+    bookings = Booking.objects.all()
+
+    window_start = _parse_window_bound(request.GET.get('start'))
+    window_end   = _parse_window_bound(request.GET.get('end'))
+    if window_start:
+        # The lower start bound keeps the (start, end) index scan to the
+        # window instead of all history before window_end.
+        bookings = bookings.filter(end__gt=window_start, start__gte=window_start - MAX_BOOKING_DURATION)
+    if window_end:
+        bookings = bookings.filter(start__lt=window_end)
+
+    room_id = request.GET.get('room', '')
+    if room_id.isdigit():
+        bookings = bookings.filter(room_id=int(room_id))
+    status = request.GET.get('status')
+    if status:
+        bookings = bookings.filter(status=status)
+
+    fields = parse_fields(request.GET.get('fields'))
+    if request.GET.get('format') == 'compact':
+        return json_response(compact_events(bookings.order_by('-start'), API_BOOKINGS_MAX_RESULTS, fields))
+    events = event_rows(bookings.order_by('-start')[:API_BOOKINGS_MAX_RESULTS], fields, chunk_size=STREAM_CHUNK)
+    return stream_json_array(events)
+
+
+@login_required
+def api_booking_changes(request):
+    """
+    Bookings created, updated or deleted since ``?since=<token>`` (optional
+    ``room=<id>``). Without ``since`` only a starting token is returned:
+    take it, load the calendar in full, then poll with it and keep the
+    ``next`` token of each answer; fetch again at once while ``more`` is
+    true. A token older than the tombstone retention gets a 410 — reload.
+    """
+    since = request.GET.get('since')
+    if not since:
+        return JsonResponse({'next': current_token()})
+    room_id = request.GET.get('room', '')
+    fields  = parse_fields(request.GET.get('fields'))
+    try:
+        changes = booking_changes(since, room_id=int(room_id) if room_id.isdigit() else None)
+    except InvalidToken:
+        return JsonResponse({'error': 'invalid since token'}, status=400)
+    except TokenExpired:
+        return JsonResponse({'error': 'since token expired; reload all bookings', 'reset': True}, status=410)
+    return JsonResponse({
+        'next':    changes['next'],
+        'more':    changes['more'],
+        'created': [booking_event(b, fields) for b in changes['created']],
+        'updated': [booking_event(b, fields) for b in changes['updated']],
+        'deleted': [
+            {'id': t.booking_id, 'room': t.room_id, 'start': t.start and t.start.isoformat(),
+             'end': t.end and t.end.isoformat()}
+            for t in changes['deleted']
+        ],
+    })
+
+
+FREE_SLOTS_DEFAULT_DAYS = 14
+FREE_SLOTS_MAX_DAYS     = 62
+FREE_SLOTS_MAX_RESULTS  = 100
+
+
+@login_required
+def api_free_slots(request):
+    """
+    Earliest free (room, start) slots for ``?duration=<minutes>``.
+
+    Optional: ``from``/``to`` (local dates, default the next two weeks),
+    ``capacity`` (minimum seats), ``projector=Yes`` / ``speaker=Yes``,
+    ``hours=8-18`` and ``limit`` (default 10).
+    """
+    duration = _int_param(request.GET, 'duration')
+    if duration <= 0:
+        return JsonResponse({'error': 'duration (minutes) is required'}, status=400)
+
+    today     = timezone.localdate()
+    date_from = max(as_date(request.GET.get('from')) or today, today)
+    date_to   = as_date(request.GET.get('to')) or date_from + timedelta(days=FREE_SLOTS_DEFAULT_DAYS - 1)
+    date_to   = min(date_to, date_from + timedelta(days=FREE_SLOTS_MAX_DAYS - 1))
+    hours = _hours_param(request.GET)
+    limit = max(1, min(_int_param(request.GET, 'limit') or 10, FREE_SLOTS_MAX_RESULTS))
+
+    rooms = Room.objects.filter(capacity__gte=_int_param(request.GET, 'capacity')).order_by('name')
+    for feature in ('projector', 'speaker'):
+        if request.GET.get(feature, '').lower() in ('yes', '1', 'true'):
+            rooms = rooms.filter(**{feature: 'Yes'})
+
+    slots = free_slots(
+        rooms, date_from, date_to, timedelta(minutes=duration),
+        hours=hours, limit=limit, not_before=timezone.now(),
+    ) if date_from <= date_to else []
+    return JsonResponse({
+        'duration': duration,
+        'from':     date_from.isoformat(),
+        'to':       date_to.isoformat(),
+        'slots': [
+            {
+                'room':      room.pk,
+                'room_name': room.name,
+                'capacity':  room.capacity,
+                'start':     start.isoformat(),
+                'end':       (start + timedelta(minutes=duration)).isoformat(),
+            }
+            for start, room in slots
+        ],
+    })
 
 
 # ════════════════════════════════════════════════════════════════
@@ -250,10 +449,53 @@ def todo_delete(request, todo_id):
 # 🆕 CHAT BOX
 # ════════════════════════════════════════════════════════════════
 
+CHAT_PAGE_SIZE = 50         # messages on first paint and per "load older" page
+CHAT_POLL_MAX  = 200        # max messages per after= poll / stream catch-up
+
+
+def _int_param(params, name):
+    try:
+        return int(params.get(name, 0))
+    except ValueError:
+        return 0
+
+
 @login_required
 def chat_view(request):
-    chat_messages = ChatMessage.objects.filter(is_deleted=False).select_related('sender').order_by('created_at')
-    return render(request, 'booking/chat.html', {'chat_messages': chat_messages})
+    latest = (
+        ChatMessage.objects
+        .filter(is_deleted=False)
+        .select_related('sender__profile')
+        .order_by('-id')[:CHAT_PAGE_SIZE + 1]
+    )
+    chat_messages = list(latest)
+    has_older = len(chat_messages) > CHAT_PAGE_SIZE
+    chat_messages = chat_messages[:CHAT_PAGE_SIZE][::-1]
+    return render(request, 'booking/chat.html', {
+        'chat_messages': chat_messages,
+        'has_older':     has_older,
+        'page_size':     CHAT_PAGE_SIZE,
+    })
+
+
+# _chat_payload() as ``project`` columns, for lists of messages.
+CHAT_COLUMNS = {
+    'id':         'id',
+    'sender':     'sender__username',
+    'message':    'message',
+    'created_at': ('created_at', strftime('%b %d, %H:%M')),
+    'color':      Coalesce('sender__profile__color', Value('#6366F1')),
+}
+
+
+def _chat_payload(m):
+    return {
+        'id':         m.id,
+        'sender':     m.sender.username,
+        'message':    m.message,
+        'created_at': m.created_at.strftime('%b %d, %H:%M'),
+        'color':      getattr(m.sender.profile, 'color', '#6366F1'),
+    }
 
 
 @login_required
@@ -266,38 +508,28 @@ def chat_send(request):
         text = data.get('message', '').strip()
         if text:
             msg = ChatMessage.objects.create(sender=request.user, message=text)
-            return JsonResponse({
-                'id':         msg.id,
-                'sender':     msg.sender.username,
-                'message':    msg.message,
-                'created_at': msg.created_at.strftime('%b %d, %H:%M'),
-                'color':      getattr(msg.sender.profile, 'color', '#6366F1'),
-            })
+            payload = _chat_payload(msg)
+            chat_broker.publish('message', payload)
+            return JsonResponse(payload)
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 
 @login_required
 def chat_messages_api(request):
-    """Polling endpoint — return messages after given ID for live updates."""
-    after_id = int(request.GET.get('after', 0))
-    msgs = (
-        ChatMessage.objects
-        .filter(id__gt=after_id, is_deleted=False)
-        .select_related('sender')
-        .order_by('created_at')
-    )
-    data = [
-        {
-            'id':         m.id,
-            'sender':     m.sender.username,
-            'message':    m.message,
-            'created_at': m.created_at.strftime('%b %d, %H:%M'),
-            'color':      getattr(m.sender.profile, 'color', '#6366F1'),
-            'is_me':      m.sender_id == request.user.id,
-        }
-        for m in msgs
-    ]
-    return JsonResponse(data, safe=False)
+    """
+    Keyset-paged chat feed, oldest first.
+
+    ``?after=<id>`` — polling: up to CHAT_POLL_MAX messages newer than id.
+    ``?before=<id>`` — "load older": the CHAT_PAGE_SIZE messages just before id.
+    """
+    msgs = ChatMessage.objects.filter(is_deleted=False)
+    columns = {**CHAT_COLUMNS, 'is_me': ExpressionWrapper(Q(sender_id=request.user.id), output_field=BooleanField())}
+    before_id = _int_param(request.GET, 'before')
+    if before_id:
+        data = list(project(msgs.filter(id__lt=before_id).order_by('-id')[:CHAT_PAGE_SIZE], columns))[::-1]
+    else:
+        data = list(project(msgs.filter(id__gt=_int_param(request.GET, 'after')).order_by('id')[:CHAT_POLL_MAX], columns))
+    return json_response(data)
 
 
 @login_required
@@ -306,9 +538,78 @@ def chat_delete_message(request, msg_id):
     if request.user == msg.sender or request.user.is_superuser:
         msg.is_deleted = True
         msg.save()
+        chat_broker.publish('delete', {'id': msg.id})
     return JsonResponse({'ok': True})
 
 
+CHAT_STREAM_HEARTBEAT = 15      # seconds between keep-alive comments
+CHAT_STREAM_RESYNC    = 60      # seconds between DB catch-ups (writes from other workers)
+
+
+def _chat_messages_after(after_id):
+    msgs = ChatMessage.objects.filter(id__gt=after_id, is_deleted=False).order_by('id')[:CHAT_POLL_MAX]
+    return list(project(msgs, CHAT_COLUMNS))
+
+
+async def _chat_event_stream(after_id):
+    queue = chat_broker.subscribe()     # before the backlog query, so nothing falls in between
+    loop = asyncio.get_running_loop()
+    try:
+        yield "retry: 3000\n\n"
+        last_sync = 0
+        while True:
+            if loop.time() - last_sync >= CHAT_STREAM_RESYNC:
+                while True:
+                    batch = await sync_to_async(_chat_messages_after)(after_id)
+                    for m in batch:
+                        after_id = max(after_id, m['id'])
+                        yield sse('message', m, m['id'])
+                    if len(batch) < CHAT_POLL_MAX:
+                        break
+                last_sync = loop.time()
+            try:
+                event, data = await asyncio.wait_for(queue.get(), CHAT_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if event == 'message':
+                if data['id'] <= after_id:
+                    continue
+                after_id = data['id']
+                yield sse(event, data, data['id'])
+            else:
+                yield sse(event, data)
+    finally:
+        chat_broker.unsubscribe(queue)
+
+
+async def chat_stream(request):
+    """
+    Server-Sent Events feed of new / deleted chat messages (ASGI only).
+
+    Resumes from ``Last-Event-ID`` or ``?after=``. Under WSGI a long-lived
+    stream would pin a worker, so this answers 204 and the page keeps
+    polling ``chat_messages_api`` instead.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    resume = request.headers.get('Last-Event-ID') or request.GET.get('after') or 0
+    try:
+        after_id = int(resume)
+    except ValueError:
+        after_id = 0
+    if not after_id:
+        # No resume point: only stream what is new from now on.
+        after_id = await ChatMessage.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+    response = StreamingHttpResponse(_chat_event_stream(after_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ════════════════════════════════════════════════════════════════
 # 🆕 FUTURE PROJECTS (TESDA training, etc.)
 # ════════════════════════════════════════════════════════════════
@@ -354,48 +655,202 @@ def project_delete(request, project_id):
     return redirect('project_list')
 
 
+SCHEDULE_DEFAULT_DAYS = 14
+SCHEDULE_MAX_DAYS     = 62
+SCHEDULE_MAX_SESSIONS = 200
+
+
+def _parse_sessions(text):
+    """
+    ``SessionRequest`` list from lines of ``title, attendees, minutes[, projector][, speaker]``.
+    Returns ``(sessions, errors)``.
+    """
+    sessions, errors = [], []
+    for n, row in enumerate(csv.reader(text.splitlines()), 1):
+        row = [cell.strip() for cell in row]
+        if not any(row):
+            continue
+        try:
+            title, attendees, minutes = row[0], int(row[1]), int(row[2])
+        except (IndexError, ValueError):
+            errors.append(f"Line {n}: expected title, attendees, minutes.")
+            continue
+        if not title or attendees <= 0 or minutes <= 0:
+            errors.append(f"Line {n}: title, attendees and minutes are required.")
+            continue
+        flags = {cell.lower() for cell in row[3:]}
+        sessions.append(SessionRequest(title, attendees, minutes, 'projector' in flags, 'speaker' in flags))
+    return sessions, errors
+
+
+@login_required
+def project_schedule(request, project_id):
+    """
+    Auto-assign rooms and times to a batch of the project's sessions
+    (``scheduler.solve``) and, unless previewing, book them all at once.
+    """
+    project = get_object_or_404(FutureProject, id=project_id)
+    today   = timezone.localdate()
+    context = {'project': project, 'sessions_text': '', 'preview': True,
+               'date_from': today, 'date_to': today + timedelta(days=SCHEDULE_DEFAULT_DAYS - 1), 'hours': '%d-%d' % DEFAULT_HOURS}
+    if request.method != 'POST':
+        return render(request, 'booking/project_schedule.html', context)
+
+    sessions, errors = _parse_sessions(request.POST.get('sessions', ''))
+    date_from = max(as_date(request.POST.get('from')) or today, today)
+    date_to   = as_date(request.POST.get('to')) or date_from + timedelta(days=SCHEDULE_DEFAULT_DAYS - 1)
+    date_to   = min(date_to, date_from + timedelta(days=SCHEDULE_MAX_DAYS - 1))
+    hours     = _hours_param(request.POST)
+    preview   = bool(request.POST.get('preview'))
+    context.update(sessions_text=request.POST.get('sessions', ''), preview=preview,
+                   date_from=date_from, date_to=date_to, hours='%d-%d' % hours)
+    if not sessions:
+        errors.append("Enter at least one session.")
+    if len(sessions) > SCHEDULE_MAX_SESSIONS:
+        errors.append(f"At most {SCHEDULE_MAX_SESSIONS} sessions per batch.")
+    if date_to < date_from:
+        errors.append("The end date is before the start date.")
+    if errors:
+        for error in errors:
+            messages.error(request, error)
+        return render(request, 'booking/project_schedule.html', context)
+
+    schedule  = solve_schedule(sessions, date_from, date_to, hours=hours, not_before=timezone.now())
+    conflicts = []
+    if not preview and schedule.placements:
+        created, conflicts = commit_schedule(schedule, request.user, title_prefix=f"{project.title}: ")
+        messages.success(request, f"{len(created)} session(s) booked.")
+    context.update(
+        schedule=schedule,
+        placements=[(req, room, start, start + req.duration) for req, room, start in schedule.placements],
+        conflicts=conflicts,
+        solve_ms=round(schedule.solve_seconds * 1000, 1),
+    )
+    return render(request, 'booking/project_schedule.html', context)
+
+
 # ════════════════════════════════════════════════════════════════
 # 🆕 ROOM BILLING REPORT (Admin)
 # ════════════════════════════════════════════════════════════════
 
+BILLING_DETAIL_LIMIT = 500
+
+
+def _parse_month(value):
+    try:
+        return datetime.strptime(value or "", "%Y-%m").date()
+    except ValueError:
+        return None
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def room_billing_report(request):
-    bookings      = Booking.objects.select_related('room', 'created_by').order_by('-start')
-    total_revenue = sum(b.total_cost for b in bookings)
+    """
+    Billing totals read from ``BillingRollup`` (see ``rollups.py``).
+
+    ``?month=all`` lists one row per month; ``?month=YYYY-MM`` (default: the
+    latest month) lists room × user totals; adding ``&room=<id>&user=<id>``
+    drills down into that slice's raw bookings.
+    """
+    months = list(BillingRollup.objects.dates('month', 'month', order='DESC'))
+    closed = set(BillingPeriod.objects.values_list('month', flat=True))
+    month  = None if request.GET.get('month') == 'all' else (
+        _parse_month(request.GET.get('month')) or (months[0] if months else None)
+    )
+
+    rollups = BillingRollup.objects.all()
+    if month:
+        rollups = rollups.filter(month=month)
+        rows = rollups.select_related('room', 'user').order_by('room__name', 'user__username')
+    else:
+        rows = (rollups.values('month').order_by('-month')
+                .annotate(bookings=Sum('bookings'), hours=Sum('hours'), revenue=Sum('revenue')))
+    totals = rollups.aggregate(bookings=Sum('bookings'), hours=Sum('hours'), revenue=Sum('revenue'))
+    total_revenue = totals['revenue'] or Decimal('0')
+
+    detail = None
+    room_id, user_id = request.GET.get('room', ''), request.GET.get('user', '')
+    if month and room_id.isdigit() and user_id.isdigit():
+        start, end = month_bounds(month)
+        detail = list(
+            Booking.objects
+            .filter(room_id=room_id, created_by_id=user_id, start__gte=start, start__lt=end)
+            .select_related('room', 'created_by')
+            .order_by('-start')[:BILLING_DETAIL_LIMIT]
+        )
+
     return render(request, 'booking/room_billing.html', {
-        'bookings':      bookings,
-        'total_revenue': total_revenue,
+        'months':         [(m, m in closed) for m in months],
+        'month':          month,
+        'month_closed':   month in closed,
+        'rows':           rows,
+        'total_bookings': totals['bookings'] or 0,
+        'total_hours':    totals['hours'] or 0,
+        'total_revenue':  total_revenue,
+        'avg_cost':       total_revenue / totals['bookings'] if totals['bookings'] else None,
+        'detail':         detail,
+        'detail_limit':   BILLING_DETAIL_LIMIT,
     })
 
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def export_billing_excel(request):
-    bookings = Booking.objects.select_related("room", "created_by").order_by("-start")
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Room Billing"
-    ws.append([
-        "ID", "Title", "Room", "Start", "End",
-        "Hours Used", "Rate/hr (PHP)", "Total Cost (PHP)",
-        "Booked By", "Status",
-    ])
-    for b in bookings:
-        ws.append([
-            b.id, b.title, b.room.name,
-            b.start.strftime("%Y-%m-%d %H:%M"),
-            b.end.strftime("%Y-%m-%d %H:%M"),
-            float(b.hours_used),
-            float(b.room.price_per_hour),
-            float(b.total_cost),
-            b.created_by.username,
-            b.status,
-        ])
-    response = HttpResponse(content_type="application/ms-excel")
-    response['Content-Disposition'] = 'attachment; filename="room_billing.xlsx"'
-    wb.save(response)
-    return response
+    """Rollup totals for the ``from``..``to`` months; ``?detail=1`` exports raw bookings instead."""
+    if request.GET.get("detail"):
+        bookings = filter_by_dates(Booking.objects.all(), request.GET.get("from"), request.GET.get("to"))
+        return xlsx_response("room_billing.xlsx", "Room Billing", BILLING_HEADER, billing_rows(bookings))
+    rollups = BillingRollup.objects.all()
+    date_from, date_to = as_date(request.GET.get("from")), as_date(request.GET.get("to"))
+    if date_from:
+        rollups = rollups.filter(month__gte=month_of(date_from))
+    if date_to:
+        rollups = rollups.filter(month__lte=month_of(date_to))
+    return xlsx_response("room_billing_summary.xlsx", "Billing Summary", ROLLUP_HEADER, rollup_rows(rollups))
+
+
+# ════════════════════════════════════════════════════════════════
+# 🆕 ROOM UTILIZATION (Admin)
+# ════════════════════════════════════════════════════════════════
+
+UTILIZATION_DEFAULT_DAYS = 365
+UTILIZATION_MAX_DAYS     = 731
+WEEKDAY_NAMES            = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def _hours_param(params):
+    """Opening hours from ``hours=8-18`` in a QueryDict as ``(first, last)``; DEFAULT_HOURS if absent or invalid."""
+    try:
+        first, last = (int(h) for h in params.get('hours', '').split('-'))
+    except ValueError:
+        return DEFAULT_HOURS
+    return (first, last) if 0 <= first < last <= 24 else DEFAULT_HOURS
+
+
+def _utilization_stats(request):
+    """Stats for ``?from=&to=`` (default: the last year) and ``?hours=8-18``."""
+    date_to   = as_date(request.GET.get('to')) or timezone.localdate()
+    date_from = as_date(request.GET.get('from')) or date_to - timedelta(days=UTILIZATION_DEFAULT_DAYS - 1)
+    date_from = min(max(date_from, date_to - timedelta(days=UTILIZATION_MAX_DAYS - 1)), date_to)
+    return utilization_stats(occupancy(date_from, date_to), hours=_hours_param(request.GET))
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def utilization_report(request):
+    stats = _utilization_stats(request)
+    return render(request, 'booking/utilization_report.html', {
+        'stats':    stats,
+        'heatmap':  list(zip(WEEKDAY_NAMES, stats['heatmap'], stats['by_weekday'])),
+        'hour_labels': range(24),
+    })
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def api_utilization(request):
+    return JsonResponse(_utilization_stats(request))
 
 
 # ════════════════════════════════════════════════════════════════
@@ -434,29 +889,69 @@ def deactivate_user(request, user_id):
 # ADMIN DASHBOARD
 # ════════════════════════════════════════════════════════════════
 
+ADMIN_BOOKINGS_PER_PAGE = 25
+ADMIN_SUMMARY_CACHE_SECONDS = 300
+
+
+def _admin_summary():
+    """
+    Summary-card numbers, computed with one conditional aggregate per table
+    and cached under the current bookings/users change versions, so every
+    worker drops its copy as soon as a Booking, Room or User is written.
+    """
+    versions  = current_versions('bookings', 'users')
+    cache_key = f"admin_summary:{versions['bookings']}:{versions['users']}"
+    summary   = cache.get(cache_key)
+    if summary is None:
+        summary = Booking.objects.aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status="Pending")),
+            approved=Count('id', filter=Q(status="Approved")),
+            revenue=Coalesce(Sum('total_cost'), Value(Decimal('0')), output_field=DecimalField()),
+        )
+        summary['staff'] = User.objects.filter(is_staff=True, is_superuser=False).count()
+        summary['rooms'] = Room.objects.count()
+        cache.set(cache_key, summary, ADMIN_SUMMARY_CACHE_SECONDS)
+    return summary
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def admin_dashboard(request):
-    bookings          = Booking.objects.select_related("room", "created_by")
+    bookings          = Booking.objects.select_related("room", "created_by").order_by("-start")
     staff_accounts    = User.objects.filter(is_staff=True, is_superuser=False).order_by("username")
     all_users         = User.objects.filter(is_superuser=False).order_by("username")
     password_requests = PasswordChangeRequest.objects.filter(approved=False).order_by("-requested_at")
-    rooms             = Room.objects.all().order_by("name")
+    rooms             = room_catalog().by_name
     pending_users     = User.objects.filter(is_active=False)
     projects          = FutureProject.objects.all().order_by('target_date')[:5]
-    total_revenue     = sum(b.total_cost for b in bookings)
+    summary           = _admin_summary()
+    total_revenue     = summary['revenue']
+    heatmap_month     = month_of(timezone.localdate())
+
+    # Paged without COUNT(*): fetch one extra row to know whether there is a next page.
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    offset    = (page - 1) * ADMIN_BOOKINGS_PER_PAGE
+    page_rows = list(bookings[offset:offset + ADMIN_BOOKINGS_PER_PAGE + 1])
 
     summary_cards = [
-        {"label": "Total Bookings", "count": bookings.count(),                          "icon": "bi-journal-bookmark"},
-        {"label": "Pending",        "count": bookings.filter(status="Pending").count(), "icon": "bi-hourglass-split"},
-        {"label": "Approved",       "count": bookings.filter(status="Approved").count(),"icon": "bi-check-circle"},
-        {"label": "Staff Accounts", "count": staff_accounts.count(),                    "icon": "bi-people"},
-        {"label": "Rooms",          "count": rooms.count(),                              "icon": "bi-building"},
-        {"label": "Total Revenue",  "count": f"₱{total_revenue:,.2f}",                  "icon": "bi-cash-stack"},
+        {"label": "Total Bookings", "count": summary['total'],            "icon": "bi-journal-bookmark"},
+        {"label": "Pending",        "count": summary['pending'],          "icon": "bi-hourglass-split"},
+        {"label": "Approved",       "count": summary['approved'],         "icon": "bi-check-circle"},
+        {"label": "Staff Accounts", "count": summary['staff'],            "icon": "bi-people"},
+        {"label": "Rooms",          "count": summary['rooms'],            "icon": "bi-building"},
+        {"label": "Total Revenue",  "count": f"₱{total_revenue:,.2f}",   "icon": "bi-cash-stack"},
     ]
 
     return render(request, "booking/admin_dashboard.html", {
-        "bookings":          bookings,
+        "bookings":          page_rows[:ADMIN_BOOKINGS_PER_PAGE],
+        "recent_bookings":   page_rows[:8] if page == 1 else bookings[:8],
+        "page":              page,
+        "has_prev":          page > 1,
+        "has_next":          len(page_rows) > ADMIN_BOOKINGS_PER_PAGE,
         "staff_accounts":    staff_accounts,
         "all_users":         all_users,
         "password_requests": password_requests,
@@ -465,6 +960,9 @@ def admin_dashboard(request):
         "pending_users":     pending_users,
         "projects":          projects,
         "total_revenue":     total_revenue,
+        "heatmap":           room_hour_heatmap(rooms, heatmap_month),
+        "heatmap_month":     heatmap_month,
+        "heatmap_hours":     range(24),
     })
 
 
@@ -549,25 +1047,90 @@ def reject_user(request, user_id):
 # NOTIFICATION APIs
 # ════════════════════════════════════════════════════════════════
 
+PASSWORD_REQUEST_COLUMNS = {
+    "id":           "id",
+    "user":         "user__username",
+    "requested_at": ("requested_at", strftime("%Y-%m-%d %H:%M:%S")),
+}
+PENDING_USER_COLUMNS = {
+    "id":          "id",
+    "username":    "username",
+    "date_joined": ("date_joined", strftime("%Y-%m-%d %H:%M")),
+}
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def pending_password_requests_api(request):
     pending = PasswordChangeRequest.objects.filter(approved=False, notified=False)
-    data = [
-        {"id": r.id, "user": r.user.username, "requested_at": r.requested_at.strftime("%Y-%m-%d %H:%M:%S")}
-        for r in pending
-    ]
+    data = list(project(pending, PASSWORD_REQUEST_COLUMNS))     # read before they are marked notified
     pending.update(notified=True)
-    return JsonResponse(data, safe=False)
+    return json_response(data)
 
 
 def pending_user_registrations_api(request):
     users = User.objects.filter(is_active=False)
-    data = [
-        {"id": u.id, "username": u.username, "date_joined": u.date_joined.strftime("%Y-%m-%d %H:%M")}
-        for u in users
-    ]
-    return JsonResponse(data, safe=False)
+    return stream_json_array(project(users, PENDING_USER_COLUMNS, STREAM_CHUNK))
+
+
+NOTIFY_MAX_WAIT      = 25    # seconds a long-poll may be held open
+NOTIFY_POLL_INTERVAL = 1     # seconds between change-counter checks while waiting
+
+
+def _poll_wait(params):
+    """``?wait=`` as seconds within [0, NOTIFY_MAX_WAIT]; 0 if missing, malformed or not finite."""
+    try:
+        wait = float(params.get("wait", 0))
+    except ValueError:
+        return 0
+    return min(max(wait, 0), NOTIFY_MAX_WAIT) if math.isfinite(wait) else 0
+
+
+def _admin_notifications(version):
+    pending = PasswordChangeRequest.objects.filter(approved=False, notified=False)
+    data = {
+        "version": version,
+        "password_requests": list(project(pending, PASSWORD_REQUEST_COLUMNS)),
+        "pending_password_count": PasswordChangeRequest.objects.filter(approved=False).count(),
+        "pending_users": list(project(User.objects.filter(is_active=False), PENDING_USER_COLUMNS)),
+    }
+    pending.update(notified=True)
+    return data
+
+
+async def admin_notifications_api(request):
+    """
+    Unified admin notification feed, driven by ChangeVersion('notifications').
+
+    ``?version=<n>`` is the version the client already has. If it is still
+    current the request waits up to ``?wait=<s>`` seconds (max
+    NOTIFY_MAX_WAIT) for a change, checking only the counter row, and
+    answers 304 if nothing changed. Otherwise it returns the feed with the
+    new version. Under WSGI a held request would pin a worker, so it never
+    waits there; only a 304 that was actually held carries the
+    ``X-Poll-Held`` header, and the page pauses before asking again
+    otherwise.
+    """
+    user = await request.auser()
+    if not user.is_superuser:
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    try:
+        known = int(request.GET["version"]) if request.GET.get("version") else None
+    except ValueError:
+        known = None
+    wait = _poll_wait(request.GET) if isinstance(request, ASGIRequest) else 0
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    version = await acurrent_version("notifications")
+    while version == known:
+        if loop.time() >= deadline:
+            response = HttpResponse(status=304)
+            if wait:
+                response["X-Poll-Held"] = "1"
+            return response
+        await asyncio.sleep(NOTIFY_POLL_INTERVAL)
+        version = await acurrent_version("notifications")
+    return JsonResponse(await sync_to_async(_admin_notifications)(version))
 
 
 # ════════════════════════════════════════════════════════════════
@@ -577,8 +1140,7 @@ def pending_user_registrations_api(request):
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def manage_rooms(request):
-    rooms = Room.objects.all().order_by("name")
-    return render(request, "booking/admin_dashboard.html", {"rooms": rooms})
+    return render(request, "booking/admin_dashboard.html", {"rooms": room_catalog().by_name})
 
 
 @login_required
@@ -613,11 +1175,16 @@ def update_room(request, room_id):
         room.tables         = request.POST.get("tables") or 0
         room.chairs         = request.POST.get("chairs") or 0
         room.description    = request.POST.get("description", "")
-        room.price_per_hour = request.POST.get("price_per_hour") or 0
+        old_price           = room.price_per_hour
+        room.price_per_hour = Decimal(request.POST.get("price_per_hour") or 0)
         if request.FILES.get("image"):
             room.image = request.FILES["image"]
         room.save()
         messages.success(request, f"{room.name} updated.")
+        if room.price_per_hour != old_price:
+            # New rate applies to bookings that have not started yet.
+            result = recalculate_costs(room=room, future_only=True)
+            messages.info(request, f"Re-priced {result['rows']} upcoming booking(s).")
         return redirect("admin_dashboard")
     return render(request, "booking/update_room.html", {"room": room})
 
@@ -663,9 +1230,10 @@ def holiday_create(request):
 
 
 @login_required
+@conditional_on('holidays')
 def ph_holidays(request):
-    holidays = list(Holiday.objects.values("date", "description"))
-    return JsonResponse(holidays, safe=False)
+    holidays = project(Holiday.objects.all(), {"date": ("date", iso), "description": "description"}, STREAM_CHUNK)
+    return stream_json_array(holidays)
 
 
 # ════════════════════════════════════════════════════════════════
@@ -675,24 +1243,58 @@ def ph_holidays(request):
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def export_bookings_excel(request):
-    bookings = Booking.objects.select_related("room", "created_by").order_by("-start")
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Bookings"
-    ws.append(["ID", "Title", "Room", "Start", "End", "Created By", "Attendees",
-                "Status", "Hours Used", "Rate/hr (PHP)", "Total Cost (PHP)"])
-    for b in bookings:
-        ws.append([
-            b.id, b.title, b.room.name,
-            b.start.strftime("%Y-%m-%d %H:%M"),
-            b.end.strftime("%Y-%m-%d %H:%M"),
-            b.created_by.username, b.attendees, b.status,
-            float(b.hours_used), float(b.room.price_per_hour), float(b.total_cost),
-        ])
-    response = HttpResponse(content_type="application/ms-excel")
-    response['Content-Disposition'] = 'attachment; filename="bookings.xlsx"'
-    wb.save(response)
-    return response
+    bookings = filter_by_dates(Booking.objects.all(), request.GET.get("from"), request.GET.get("to"))
+    return xlsx_response("bookings.xlsx", "Bookings", BOOKINGS_HEADER, booking_rows(bookings))
+
+
+def _export_job_json(job):
+    return {
+        "id":           job.id,
+        "kind":         job.kind,
+        "format":       job.file_format,
+        "status":       job.status,
+        "progress":     job.progress,
+        "rows_written": job.rows_written,
+        "rows_total":   job.rows_total,
+        "error":        job.error,
+        "status_url":   reverse("export_job_status", args=[job.id]),
+        "download_url": reverse("export_job_download", args=[job.id]) if job.status == "Done" and job.file else None,
+    }
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def export_job_start(request):
+    """Queue a background export (or return an identical in-flight or finished one)."""
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    kind        = request.POST.get("kind", "bookings")
+    file_format = request.POST.get("format", "xlsx")
+    if kind not in dict(ExportJob.KIND_CHOICES) or file_format not in dict(ExportJob.FORMAT_CHOICES):
+        return JsonResponse({"error": "Unknown export kind or format"}, status=400)
+    job = enqueue_export(
+        request.user, kind, file_format,
+        as_date(request.POST.get("from")), as_date(request.POST.get("to")),
+    )
+    return JsonResponse(_export_job_json(job))
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def export_job_status(request, job_id):
+    """Progress polling endpoint for a background export."""
+    job = get_object_or_404(ExportJob, id=job_id)
+    if is_stale(job):
+        fail_stale_jobs()
+        job.refresh_from_db()
+    return JsonResponse(_export_job_json(job))
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def export_job_download(request, job_id):
+    job = get_object_or_404(ExportJob.objects.exclude(file=""), id=job_id, status="Done")
+    return FileResponse(job.file.open("rb"), as_attachment=True, filename=os.path.basename(job.file.name))
 
 
 @login_required
@@ -51,6 +51,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file, not SQLite's shared in-memory database, so the concurrent
+        # booking tests see the same locking as the real database. Removed
+        # after the run; ignored by git in case a run is interrupted.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 